@@ -10,52 +10,40 @@ from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
 from utils import (
-    load_data, calculate_returns, calculate_volatility, 
+    calculate_returns, calculate_volatility, 
     calculate_correlation, identify_btc_seasons, 
     calculate_performance_metrics, save_data
 )
+from config import DATA_DIR, STORAGE_BACKEND
+from crypto_panel import MarketPanel
+from crypto_correlation import lag_scan
 
 class QANXBTCAnalyzer:
     def __init__(self):
         self.btc_data = None
         self.qanx_data = None
         self.merged_data = None
+        self.panel = None
         self.analysis_results = {}
         
     def load_data(self):
         """Carrega os dados históricos"""
         print("Carregando dados históricos...")
 
-        self.btc_data = load_data('btc_historical.csv')
-        self.qanx_data = load_data('qanx_historical.csv')
+        # O catálogo dá o período comum sem abrir os arquivos; só ele é lido.
+        # Espelho memory-mapped quando disponível: processos compartilham as páginas
+        coins = ['btc', 'qanx']
+        start, end = MarketPanel.overlap(coins, DATA_DIR)
+        self.panel = MarketPanel.load(coins, DATA_DIR, STORAGE_BACKEND, start, end)
 
-        if self.btc_data is None or self.qanx_data is None:
+        if self.panel.coins != coins:
             raise ValueError("Dados não encontrados. Execute data_collector.py primeiro.")
 
-        # Garante que os índices são datetime
-        if not isinstance(self.btc_data.index, pd.DatetimeIndex):
-            self.btc_data.index = pd.to_datetime(self.btc_data.index)
-        if not isinstance(self.qanx_data.index, pd.DatetimeIndex):
-            self.qanx_data.index = pd.to_datetime(self.qanx_data.index)
-
-        # Remove dados com valores nulos
-        self.btc_data = self.btc_data.dropna()
-        self.qanx_data = self.qanx_data.dropna()
-
-        # Encontra o período comum
-        start_date = max(self.btc_data.index.min(), self.qanx_data.index.min())
-        end_date = min(self.btc_data.index.max(), self.qanx_data.index.max())
-
-        # Filtra para o período comum
-        self.btc_data = self.btc_data[start_date:end_date]
-        self.qanx_data = self.qanx_data[start_date:end_date]
-
-        # Merge dos dados por data
-        self.merged_data = pd.merge(
-            self.btc_data[['price', 'volume', 'market_cap']].add_suffix('_btc'),
-            self.qanx_data[['price', 'volume', 'market_cap']].add_suffix('_qanx'),
-            left_index=True, right_index=True, how='inner'
-        )
+        # Datas com registro completo nas duas moedas (período comum já alinhado)
+        common = self.panel.common()
+        self.btc_data = common.coin_frame('btc')
+        self.qanx_data = common.coin_frame('qanx')
+        self.merged_data = common.to_frame()
 
         print(f"Dados carregados: {len(self.merged_data)} registros de {self.merged_data.index.min()} a {self.merged_data.index.max()}")
         
@@ -163,27 +151,22 @@ class QANXBTCAnalyzer:
         print(f"Performance QANX em bull markets BTC: {qanx_bull_performance:.2f}% anual")
         print(f"Performance QANX em bear markets BTC: {qanx_bear_performance:.2f}% anual")
         
-    def analyze_lag_correlation(self):
-        """Analisa correlação com diferentes lags temporais"""
+    def analyze_lag_correlation(self, max_lag=10):
+        """
+        Analisa correlação com diferentes lags temporais
+        Lag positivo: QANX atrasado em relação ao BTC, corr(btc[t], qanx[t + lag]).
+        Todos os lags saem de uma correlação cruzada por FFT, comparando
+        posições (e não rótulos de data, que realinhavam as fatias e faziam
+        todo lag medir a correlação sem atraso).
+        """
         btc_returns = calculate_returns(self.merged_data['price_btc'])
         qanx_returns = calculate_returns(self.merged_data['price_qanx'])
-        
-        lag_correlations = {}
-        
-        # Testa lags de -10 a +10 dias
-        for lag in range(-10, 11):
-            if lag == 0:
-                corr = btc_returns.corr(qanx_returns)
-            elif lag > 0:
-                # QANX atrasado em relação ao BTC
-                corr = btc_returns[:-lag].corr(qanx_returns[lag:])
-            else:
-                # QANX adiantado em relação ao BTC
-                corr = btc_returns[-lag:].corr(qanx_returns[:lag])
-            
-            lag_correlations[lag] = corr
-        
-        return lag_correlations
+        btc_returns, qanx_returns = btc_returns.align(qanx_returns, join='inner')
+
+        scan = lag_scan(btc_returns.to_numpy(), qanx_returns.to_numpy(), max_lag)
+        self.analysis_results['lag_scan'] = scan
+
+        return dict(zip(scan['lags'].tolist(), scan['correlations'].tolist()))
     
     def test_manipulation_theory(self):
         """Testa a teoria de manipulação do fundo QANX"""
@@ -330,7 +313,8 @@ class QANXBTCAnalyzer:
             'rolling_correlation': self.analysis_results['correlations']['rolling_correlation']
         })
         
-        save_data(results_df, 'analysis_results.csv')
+        # Saída da análise, não um histórico: sempre em CSV
+        save_data(results_df, 'analysis_results.csv', backend='csv', compact=False)
         
         # Gera insights
         insights = self.generate_insights()
@@ -0,0 +1,75 @@
+"""
+Benchmark do parser de /market_chart: loop linha a linha vs. parse_market_chart
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from crypto_data_collector import parse_market_chart
+
+def parse_market_chart_loop(data):
+    """Parser original, linha a linha (mantido aqui apenas como referência)"""
+    prices = data.get('prices', [])
+    volumes = data.get('total_volumes', [])
+    market_caps = data.get('market_caps', [])
+
+    df_data = []
+    for i, (timestamp, price) in enumerate(prices):
+        date = pd.to_datetime(timestamp, unit='ms')
+        volume = volumes[i][1] if i < len(volumes) else 0
+        market_cap = market_caps[i][1] if i < len(market_caps) else 0
+
+        df_data.append({
+            'date': date,
+            'price': price,
+            'volume': volume,
+            'market_cap': market_cap
+        })
+
+    df = pd.DataFrame(df_data)
+    df.set_index('date', inplace=True)
+    return df.sort_index()
+
+def create_payload(points):
+    """Gera uma resposta sintética horária no formato da API CoinGecko"""
+    rng = np.random.default_rng(42)
+    start = pd.Timestamp('2019-01-01').value // 10**6
+    timestamps = start + np.arange(points) * 3600 * 1000
+    prices = 3500 * np.exp(np.cumsum(rng.normal(0, 0.01, points)))
+
+    return {
+        'prices': [[int(t), float(p)] for t, p in zip(timestamps, prices)],
+        'total_volumes': [[int(t), float(v)] for t, v in zip(timestamps, rng.uniform(1e9, 3e9, points))],
+        'market_caps': [[int(t), float(p * 19e6)] for t, p in zip(timestamps, prices)]
+    }
+
+def benchmark(func, payload, repeat=3):
+    """Retorna o melhor tempo (s) entre `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print("=== BENCHMARK market_chart ===")
+
+    for years in [1, 5]:
+        points = years * 365 * 24
+        payload = create_payload(points)
+
+        loop_time = benchmark(parse_market_chart_loop, payload)
+        vectorized_time = benchmark(parse_market_chart, payload)
+
+        assert np.allclose(
+            parse_market_chart_loop(payload).to_numpy(),
+            parse_market_chart(payload).to_numpy()
+        )
+
+        print(f"{years} ano(s) horário ({points} pontos):")
+        print(f"  Loop:       {loop_time * 1000:.1f} ms")
+        print(f"  Vetorizado: {vectorized_time * 1000:.1f} ms ({loop_time / vectorized_time:.0f}x)")
+
+if __name__ == "__main__":
+    main()
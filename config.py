@@ -23,6 +23,24 @@ DASH_DEBUG = True
 DATA_DIR = "data"
 CHARTS_DIR = "charts"
 
+# Armazenamento dos históricos e modo compacto: as mesmas configurações do
+# coletor universal (CRIPTOCAPTOR_STORAGE e CRIPTOCAPTOR_COMPACT), para que
+# leituras e gravações usem o mesmo backend e a mesma representação
+from crypto_config import STORAGE_BACKEND, COMPACT_DTYPES
+
+# Espelho memory-mapped (DATA_DIR/mmap) atualizado a cada gravação, lido sem cópia.
+# Ele guarda sempre float64 completo, então fica desligado no modo compacto: a
+# economia do modo compacto vale para o armazenamento e para load_data
+MMAP_STORE = not COMPACT_DTYPES
+
+# Modo compacto: colunas abaixo gravadas como float32 ou inteiros escalados
+# ((dtype, casas decimais), ex.: ('int32', -2) = centenas); colunas zeradas ou
+# proporcionais ao preço (market cap = preço x supply) não são gravadas
+COMPACT_COLUMNS = {
+    'volume': 'float32',
+    'market_cap': 'float32'
+}
+
 # Cores para gráficos
 COLORS = {
     'qanx': '#00D4FF',
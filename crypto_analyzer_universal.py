@@ -14,12 +14,15 @@ from crypto_config import (
     BULL_MARKET_THRESHOLD, BEAR_MARKET_THRESHOLD,
     HIGH_CORRELATION_THRESHOLD, LOW_CORRELATION_THRESHOLD
 )
+from crypto_panel import MarketPanel
+from crypto_correlation import panel_correlation, panel_iter_rolling_correlation, top_pairs, lag_scan
 
 class UniversalCryptoAnalyzer:
     def __init__(self):
         self.crypto1_data = None
         self.crypto2_data = None
         self.merged_data = None
+        self.panel = None
         self.analysis_results = {}
         
     def load_data(self, crypto1_data, crypto2_data=None, crypto1_name="Crypto1", crypto2_name="Crypto2"):
@@ -52,24 +55,18 @@ class UniversalCryptoAnalyzer:
         self.crypto1_data = self.crypto1_data.dropna()
         self.crypto2_data = self.crypto2_data.dropna()
 
-        # Encontra período comum
-        start_date = max(self.crypto1_data.index.min(), self.crypto2_data.index.min())
-        end_date = min(self.crypto1_data.index.max(), self.crypto2_data.index.max())
+        # Painel alinhado das duas moedas; o período comum são as datas com ambas válidas
+        name1, name2 = self.crypto1_name.lower(), self.crypto2_name.lower()
+        self.panel = MarketPanel.from_frames({name1: self.crypto1_data, name2: self.crypto2_data},
+                                             fields=('price', 'volume'))
+        common = self.panel.common()
+        self.merged_data = common.to_frame()
 
-        # Filtra para período comum
-        crypto1_filtered = self.crypto1_data[start_date:end_date]
-        crypto2_filtered = self.crypto2_data[start_date:end_date]
-
-        # Combina dados
-        self.merged_data = pd.DataFrame({
-            f'price_{self.crypto1_name.lower()}': crypto1_filtered['price'],
-            f'volume_{self.crypto1_name.lower()}': crypto1_filtered['volume'],
-            f'price_{self.crypto2_name.lower()}': crypto2_filtered['price'],
-            f'volume_{self.crypto2_name.lower()}': crypto2_filtered['volume']
-        })
-
-        self.merged_data = self.merged_data.dropna()
-        print(f"📊 Dados combinados: {len(self.merged_data)} registros de {start_date.date()} a {end_date.date()}")
+        if len(self.merged_data):
+            start_date, end_date = self.merged_data.index.min(), self.merged_data.index.max()
+            print(f"📊 Dados combinados: {len(self.merged_data)} registros de {start_date.date()} a {end_date.date()}")
+        else:
+            print("📊 Dados combinados: 0 registros (sem período comum)")
 
     def calculate_technical_indicators(self, data, price_col='price'):
         """Calcula indicadores técnicos"""
@@ -152,8 +149,8 @@ class UniversalCryptoAnalyzer:
         
         return self.analysis_results['single_crypto']
 
-    def analyze_correlation(self):
-        """Análise de correlação entre duas criptomoedas"""
+    def analyze_correlation(self, max_lag=10):
+        """Análise de correlação entre duas criptomoedas (lags de -max_lag a +max_lag)"""
         if self.merged_data is None or self.crypto2_data is None:
             print("❌ Dados de duas criptomoedas necessários para análise de correlação")
             return
@@ -172,18 +169,12 @@ class UniversalCryptoAnalyzer:
         returns_correlation = returns1.corr(returns2)
         rolling_correlation = returns1.rolling(window=CORRELATION_WINDOW).corr(returns2)
         
-        # Análise de lag
-        lag_correlations = {}
-        for lag in range(-10, 11):
-            if lag == 0:
-                lag_corr = returns_correlation
-            elif lag > 0:
-                lag_corr = returns1.corr(returns2.shift(lag))
-            else:
-                lag_corr = returns1.shift(-lag).corr(returns2)
-            lag_correlations[lag] = lag_corr
-        
-        best_lag = max(lag_correlations.items(), key=lambda x: abs(x[1]))
+        # Análise de lag: todos os lags por FFT; lag positivo = crypto1 atrasado
+        # em relação à crypto2, corr(returns1[t], returns2[t - lag])
+        aligned1, aligned2 = returns1.align(returns2, join='inner')
+        scan = lag_scan(aligned2.to_numpy(), aligned1.to_numpy(), max_lag)
+        lag_correlations = dict(zip(scan['lags'].tolist(), scan['correlations'].tolist()))
+        best_lag = (scan['peak_lag'], scan['peak_correlation'])
         
         correlation_analysis = {
             'price_correlation': price_correlation,
@@ -192,12 +183,53 @@ class UniversalCryptoAnalyzer:
             'correlation_strength': 'Alta' if abs(returns_correlation) > HIGH_CORRELATION_THRESHOLD else 'Baixa' if abs(returns_correlation) < LOW_CORRELATION_THRESHOLD else 'Média',
             'best_lag': best_lag[0],
             'best_lag_correlation': best_lag[1],
-            'lag_analysis': lag_correlations
+            'lag_analysis': lag_correlations,
+            'lag_confidence_band': dict(zip(scan['lags'].tolist(), scan['confidence_band'].tolist())),
+            'best_lag_significant': scan['significant']
         }
         
         self.analysis_results['correlation'] = correlation_analysis
         return correlation_analysis
 
+    def analyze_universe_correlation(self, panel, window=CORRELATION_WINDOW, step=None, top=10):
+        """
+        Correlação entre todas as moedas de um MarketPanel (por exemplo
+        MarketPanel.load(POPULAR_CRYPTOS)): matriz dos retornos e, a cada
+        `step` dias (padrão: janelas consecutivas, step = window), a
+        correlação média entre os pares e os `top` pares de cada janela.
+        As matrizes móveis são resumidas uma a uma, sem montar o cubo (K, N, N).
+        """
+        if panel is None or len(panel.coins) < 2:
+            print("❌ Painel com pelo menos duas criptomoedas necessário")
+            return
+
+        print(f"\n🔍 Analisando correlações entre {len(panel.coins)} criptomoedas...")
+
+        matrix = panel_correlation(panel)
+        pairs = top_pairs(matrix, top)
+
+        first, second = np.triu_indices(len(panel.coins), k=1)
+        dates, mean_correlation, rolling_pairs = [], [], {}
+        for date, values in panel_iter_rolling_correlation(panel, window, step=window if step is None else step):
+            correlations = values[first, second]
+            correlations = correlations[np.isfinite(correlations)]
+            dates.append(date)
+            mean_correlation.append(correlations.mean() if len(correlations) else np.nan)
+            rolling_pairs[date] = top_pairs(pd.DataFrame(values, index=panel.coins, columns=panel.coins), top)
+
+        self.analysis_results['universe_correlation'] = {
+            'matrix': matrix,
+            'top_pairs': pairs,
+            'rolling_mean_correlation': pd.Series(mean_correlation, index=pd.DatetimeIndex(dates, name='date'),
+                                                  dtype='float64'),
+            'rolling_top_pairs': rolling_pairs
+        }
+
+        for coin_a, coin_b, correlation in pairs[:5]:
+            print(f"📊 {coin_a} x {coin_b}: {correlation:.3f}")
+
+        return self.analysis_results['universe_correlation']
+
     def identify_market_cycles(self, crypto_name=None):
         """Identifica ciclos de mercado (bull/bear)"""
         if crypto_name is None:
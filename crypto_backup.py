@@ -0,0 +1,328 @@
+"""
+🔥 CriptoCaptorSmart - Backups Incrementais Deduplicados 🔥
+Snapshots de DATA_DIR com chunking definido pelo conteúdo: cada arquivo é
+cortado em chunks por um hash rolante, e apenas chunks ainda não guardados
+são gravados (comprimidos) em BACKUP_DIR/chunks
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from crypto_config import (
+    DATA_DIR, BACKUP_DIR, AUTO_BACKUP, BACKUP_INTERVAL_HOURS, MAX_BACKUP_FILES,
+    MAX_CONCURRENT_REQUESTS
+)
+
+# Chunking: corte onde a soma rolante (janela de WINDOW bytes) tem os bits de
+# MASK ligados -> chunks de ~64 KB em média, limitados a [MIN, MAX]
+CHUNK_WINDOW = 48
+CHUNK_MASK = (1 << 16) - 1
+CHUNK_MIN_SIZE = 16 * 1024
+CHUNK_MAX_SIZE = 256 * 1024
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Bancos SQLite são copiados pela API de backup (consistentes mesmo com um
+# escritor ativo); WAL, shared memory e journal são estado transitório
+SQLITE_SUFFIXES = ('.sqlite', '.db')
+SQLITE_SIDECAR_SUFFIXES = ('-wal', '-shm', '-journal')
+
+# Valor pseudoaleatório fixo por byte (a tabela precisa ser estável entre execuções)
+_BYTE_TABLE = np.random.default_rng(0x43434250).integers(0, 2**32, size=256, dtype=np.uint64)
+
+
+def chunk_boundaries(buffer, final=True):
+    """
+    Posições de corte (exclusivas) dos chunks de `buffer`, vetorizado
+
+    A soma de _BYTE_TABLE sobre uma janela deslizante vem de uma soma
+    acumulada; só os poucos candidatos a corte passam pelo laço que aplica
+    os tamanhos mínimo e máximo. Com final=False o trecho após o último corte
+    não é emitido (continua no próximo bloco lido).
+    """
+    size = len(buffer)
+    if size == 0:
+        return []
+
+    candidates = np.empty(0, dtype=np.int64)
+    if size > CHUNK_MIN_SIZE:
+        values = _BYTE_TABLE[np.frombuffer(buffer, dtype=np.uint8)]
+        cumulative = np.cumsum(values, dtype=np.uint64)
+        window = cumulative[CHUNK_WINDOW - 1:].copy()
+        window[1:] -= cumulative[:-CHUNK_WINDOW]
+        # window[i] cobre os bytes [i, i + CHUNK_WINDOW); o corte fica logo após a janela
+        candidates = np.flatnonzero((window & CHUNK_MASK) == CHUNK_MASK) + CHUNK_WINDOW
+
+    boundaries, last = [], 0
+    for cut in candidates.tolist():
+        if cut - last < CHUNK_MIN_SIZE:
+            continue
+        while cut - last > CHUNK_MAX_SIZE:
+            last += CHUNK_MAX_SIZE
+            boundaries.append(last)
+        boundaries.append(cut)
+        last = cut
+
+    while size - last > CHUNK_MAX_SIZE:
+        last += CHUNK_MAX_SIZE
+        boundaries.append(last)
+    if final and last < size:
+        boundaries.append(size)
+    return boundaries
+
+
+def iter_chunks(path):
+    """Chunks (bytes) de um arquivo, lido em blocos de READ_BLOCK_SIZE"""
+    pending = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            final = not block
+            buffer = pending + block
+            start = 0
+            for cut in chunk_boundaries(buffer, final=final):
+                yield buffer[start:cut]
+                start = cut
+            pending = buffer[start:]
+            if final:
+                return
+
+
+def checkpoint_sqlite(path):
+    """Leva o WAL de um banco SQLite para o arquivo principal (melhor esforço)"""
+    try:
+        with closing(sqlite3.connect(path, timeout=30)) as connection:
+            connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    except sqlite3.Error:
+        pass
+
+
+def copy_sqlite(path, copy_path):
+    """Cópia consistente de um banco SQLite via API de backup"""
+    with closing(sqlite3.connect(path, timeout=30)) as source, closing(sqlite3.connect(copy_path)) as copy:
+        source.backup(copy)
+
+
+class BackupManager:
+    """
+    Snapshots deduplicados de um diretório
+
+    BACKUP_DIR/chunks/<aa>/<sha256>  chunks comprimidos com zlib (compartilhados)
+    BACKUP_DIR/snapshots/<data>.json manifesto: arquivo -> tamanho, mtime e chunks
+
+    Arquivos com mesmo tamanho e mtime do snapshot anterior reaproveitam a
+    lista de chunks sem serem relidos. Apenas os `max_snapshots` snapshots
+    mais recentes são mantidos; chunks sem referência são removidos.
+    """
+
+    def __init__(self, source_dir=DATA_DIR, backup_dir=BACKUP_DIR, max_snapshots=MAX_BACKUP_FILES):
+        self.source_dir = source_dir
+        self.backup_dir = backup_dir
+        self.max_snapshots = max_snapshots
+        self.chunks_dir = os.path.join(backup_dir, 'chunks')
+        self.snapshots_dir = os.path.join(backup_dir, 'snapshots')
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def _store_chunk(self, chunk):
+        """Grava o chunk se ainda não existir; retorna (hash, bytes gravados)"""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(chunk, 6)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return digest, len(compressed)
+
+    def _walk(self, directory):
+        """(caminho relativo com '/', caminho) dos arquivos de directory, fora do backup_dir"""
+        backup_dir = os.path.abspath(self.backup_dir)
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs if os.path.abspath(os.path.join(root, name)) != backup_dir]
+            for name in files:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/'), path
+
+    def _source_files(self):
+        for relative, path in self._walk(self.source_dir):
+            if not relative.endswith(('.tmp',) + SQLITE_SIDECAR_SUFFIXES):
+                yield relative, path
+
+    @contextmanager
+    def _readable(self, path):
+        """
+        Caminho a ser cortado em chunks: o próprio arquivo ou, para bancos
+        SQLite, uma cópia consistente feita pela API de backup
+        """
+        if not path.endswith(SQLITE_SUFFIXES):
+            yield path
+            return
+
+        os.makedirs(self.backup_dir, exist_ok=True)
+        copy_path = os.path.join(self.backup_dir, f"{os.path.basename(path)}.{os.getpid()}.tmp")
+        try:
+            copy_sqlite(path, copy_path)
+        except sqlite3.Error:
+            copy_path = None
+        try:
+            yield copy_path or path
+        finally:
+            if copy_path and os.path.exists(copy_path):
+                os.remove(copy_path)
+
+    def list_snapshots(self):
+        """Ids dos snapshots, do mais antigo ao mais recente"""
+        try:
+            names = os.listdir(self.snapshots_dir)
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def load_manifest(self, snapshot_id):
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), 'r') as f:
+            return json.load(f)
+
+    def snapshot(self):
+        """Cria um snapshot de source_dir; retorna o id"""
+        snapshots = self.list_snapshots()
+        previous = self.load_manifest(snapshots[-1])['files'] if snapshots else {}
+
+        files, new_bytes, reused = {}, 0, 0
+        for relative, path in self._source_files():
+            if path.endswith(SQLITE_SUFFIXES):
+                # Sem o checkpoint, gravações ainda no WAL não mudam tamanho/mtime
+                checkpoint_sqlite(path)
+            stat = os.stat(path)
+            known = previous.get(relative)
+            if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                files[relative] = known
+                reused += 1
+                continue
+
+            chunks = []
+            with self._readable(path) as readable:
+                for chunk in iter_chunks(readable):
+                    digest, written = self._store_chunk(chunk)
+                    chunks.append(digest)
+                    new_bytes += written
+            files[relative] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'chunks': chunks}
+
+        snapshot_id = pd.Timestamp.now(tz='UTC').strftime('%Y%m%dT%H%M%S%fZ')
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        path = os.path.join(self.snapshots_dir, f"{snapshot_id}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'created_at': time.time(), 'source_dir': self.source_dir, 'files': files}, f)
+        os.replace(tmp_path, path)
+
+        print(f"💾 Backup {snapshot_id}: {len(files)} arquivos ({reused} inalterados), "
+              f"{new_bytes / 1024:.1f} KB novos")
+        self.prune()
+        return snapshot_id
+
+    def prune(self):
+        """Mantém os max_snapshots mais recentes e remove chunks sem referência"""
+        snapshots = self.list_snapshots()
+        for snapshot_id in snapshots[:-self.max_snapshots] if self.max_snapshots > 0 else []:
+            os.remove(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"))
+
+        referenced = set()
+        for snapshot_id in self.list_snapshots():
+            for entry in self.load_manifest(snapshot_id)['files'].values():
+                referenced.update(entry['chunks'])
+
+        removed = 0
+        for root, _, names in os.walk(self.chunks_dir):
+            for name in names:
+                if name not in referenced:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+    def last_snapshot_time(self):
+        snapshots = self.list_snapshots()
+        return self.load_manifest(snapshots[-1])['created_at'] if snapshots else None
+
+    def restore(self, snapshot_id=None, target_dir=None, files=None, max_workers=MAX_CONCURRENT_REQUESTS):
+        """
+        Restaura um snapshot (padrão: o mais recente) em target_dir (padrão:
+        source_dir); `files` limita a restauração a alguns caminhos relativos.
+        Cada arquivo é remontado em um temporário e trocado atomicamente, e
+        WAL/journal antigos de bancos SQLite são descartados. Uma restauração
+        completa em source_dir remove os arquivos que não estavam no snapshot;
+        em outro diretório, ele precisa estar vazio ou não existir.
+        """
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError(f"Nenhum backup em {self.backup_dir}")
+        snapshot_id = snapshot_id or snapshots[-1]
+        manifest = self.load_manifest(snapshot_id)
+        target_dir = target_dir or self.source_dir
+        in_place = os.path.abspath(target_dir) == os.path.abspath(self.source_dir)
+        if files is None and not in_place and os.path.isdir(target_dir) and os.listdir(target_dir):
+            raise FileExistsError(f"Restauração completa exige um diretório vazio: {target_dir}")
+        selected = {name: entry for name, entry in manifest['files'].items()
+                    if files is None or name in files}
+
+        def restore_file(item):
+            relative, entry = item
+            path = os.path.join(target_dir, *relative.split('/'))
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as out:
+                for digest in entry['chunks']:
+                    with open(self._chunk_path(digest), 'rb') as f:
+                        out.write(zlib.decompress(f.read()))
+            if path.endswith(SQLITE_SUFFIXES):
+                for suffix in SQLITE_SIDECAR_SUFFIXES:
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+            os.replace(tmp_path, path)
+            os.utime(path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(restore_file, selected.items()))
+
+        removed = self._remove_extra_files(target_dir, selected) if files is None and in_place else 0
+
+        print(f"♻️ Backup {snapshot_id} restaurado em {target_dir}: {len(selected)} arquivos"
+              + (f", {removed} removidos" if removed else ""))
+        return snapshot_id
+
+    def _remove_extra_files(self, target_dir, files):
+        """Remove de target_dir os arquivos fora de `files` e as pastas que ficarem vazias"""
+        removed = 0
+        for relative, path in list(self._walk(target_dir)):
+            if relative not in files and not relative.endswith('.tmp'):
+                os.remove(path)
+                removed += 1
+
+        backup_dir = os.path.abspath(self.backup_dir)
+        for root, _, _ in os.walk(target_dir, topdown=False):
+            inside_backup = os.path.commonpath([os.path.abspath(root), backup_dir]) == backup_dir
+            if root != target_dir and not inside_backup and not os.listdir(root):
+                os.rmdir(root)
+        return removed
+
+
+def maybe_backup(manager=None):
+    """Cria um snapshot se AUTO_BACKUP e o último tiver mais de BACKUP_INTERVAL_HOURS"""
+    if not AUTO_BACKUP:
+        return None
+    manager = manager or BackupManager()
+    last = manager.last_snapshot_time()
+    if last is not None and time.time() - last < BACKUP_INTERVAL_HOURS * 3600:
+        return None
+    return manager.snapshot()
@@ -0,0 +1,188 @@
+"""
+🔥 CriptoCaptorSmart - Cache de Respostas 🔥
+Cache persistente em disco com TTL e despejo LRU limitado por tamanho
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from crypto_config import CACHE_DIR, CACHE_DURATION_MINUTES, MAX_CACHE_SIZE_MB
+
+
+class ResponseCache:
+    """
+    Cache de respostas das APIs gravado em CACHE_DIR
+
+    Cada entrada é um arquivo pickle com o instante de criação e o valor.
+    Entradas mais antigas que o TTL são ignoradas e o mtime do arquivo marca o
+    último acesso, usado para despejar as menos usadas quando o tamanho total
+    ultrapassa o limite.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl_minutes=CACHE_DURATION_MINUTES,
+                 max_size_mb=MAX_CACHE_SIZE_MB):
+        self.cache_dir = os.path.join(cache_dir, 'responses')
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        """Converte uma chave qualquer no caminho do arquivo de cache"""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def _entries(self):
+        """Lista (caminho, tamanho, último acesso) das entradas em disco"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_size -= size
+        except OSError:
+            pass
+
+    def get(self, key, allow_stale=False):
+        """Retorna o valor em cache ou None se ausente/expirado"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    created_at, value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self.misses += 1
+                return None
+
+            # Entradas expiradas permanecem em disco até o despejo LRU
+            if not allow_stale and time.time() - created_at > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            # Marca o acesso para a política LRU
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Grava um valor no cache e despeja entradas antigas se necessário"""
+        path = self._path(key)
+        payload = pickle.dumps((time.time(), value), protocol=pickle.HIGHEST_PROTOCOL)
+
+        if len(payload) > self.max_size_bytes:
+            return
+
+        with self._lock:
+            if os.path.exists(path):
+                self._remove(path)
+
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar no cache: {e}")
+                return
+
+            self._total_size += len(payload)
+            self._evict()
+
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar MAX_CACHE_SIZE_MB"""
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        for path, _, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+            self._total_size = 0
+
+    def stats(self):
+        """Retorna estatísticas de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'miss_rate': self.misses / total if total else 0.0,
+            'size_mb': self._total_size / (1024 * 1024),
+            'entries': len(self._entries())
+        }
+
+
+class SourceResolutionCache:
+    """
+    Memória persistente de qual fonte (método, exchange e símbolo) funcionou
+    para cada criptomoeda, gravada em CACHE_DIR/source_resolution.json
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, filename='source_resolution.json'):
+        self.path = os.path.join(cache_dir, filename)
+        self._lock = threading.Lock()
+        self._sources = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.path, 'r') as f:
+                self._sources = json.load(f)
+        except (OSError, ValueError):
+            self._sources = {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._sources, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o cache de fontes: {e}")
+
+    def get(self, crypto_id):
+        """Retorna a fonte aprendida para a moeda (ou None)"""
+        with self._lock:
+            source = self._sources.get(crypto_id)
+            return dict(source) if source else None
+
+    def set(self, crypto_id, source):
+        """Registra a fonte que funcionou para a moeda"""
+        with self._lock:
+            if self._sources.get(crypto_id) == source:
+                return
+            self._sources[crypto_id] = dict(source)
+            self._save()
+
+    def forget(self, crypto_id):
+        """Esquece a fonte de uma moeda (ex.: quando ela deixa de funcionar)"""
+        with self._lock:
+            if self._sources.pop(crypto_id, None) is not None:
+                self._save()
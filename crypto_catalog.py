@@ -0,0 +1,166 @@
+"""
+🔥 CriptoCaptorSmart - Catálogo de Dados 🔥
+Manifesto (DATA_DIR/_catalog.json) com os metadados de cada série salva:
+período coberto, número de registros, frequência, fonte, checksum e versão
+do esquema, atualizado a cada gravação
+"""
+
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from crypto_storage import normalize_index, dataset_name
+
+CATALOG_FILENAME = '_catalog.json'
+SCHEMA_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def content_checksum(data):
+    """
+    Checksum aditivo do conteúdo: soma (mod 2**64) dos hashes de cada linha,
+    incluindo a data. Acrescentar linhas soma os hashes delas, então o
+    checksum pode ser atualizado sem reler a série inteira.
+    """
+    if data is None or data.empty:
+        return 0
+    # Colunas numéricas em float64, para que int/float do mesmo valor gerem o mesmo hash
+    numeric = data.select_dtypes(include='number').columns
+    data = data.astype({column: 'float64' for column in numeric})
+    return int(pd.util.hash_pandas_object(data, index=True).to_numpy().sum(dtype='uint64'))
+
+
+def infer_frequency(index):
+    """Frequência dominante da série (mediana dos intervalos), ex.: 'D', 'h', '5min'"""
+    if len(index) < 2:
+        return None
+    step = pd.Timedelta(int(np.median(np.diff(index.as_unit('ns').asi8))))
+    if step <= pd.Timedelta(0):
+        return None
+    for unit in ('D', 'h', 'min', 's', 'ms'):
+        count, remainder = divmod(step, pd.Timedelta(1, unit=unit))
+        if count and not remainder:
+            return unit if count == 1 else f"{count}{unit}"
+    return f"{step.value}ns"
+
+
+class DataCatalog:
+    """Leitura e atualização do manifesto de um diretório de dados"""
+
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, CATALOG_FILENAME)
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('assets', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, assets):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'schema_version': SCHEMA_VERSION, 'assets': assets}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, filename):
+        """Metadados da série (ou None); datas já convertidas para Timestamp"""
+        entry = self._read().get(dataset_name(filename))
+        if entry is None:
+            return None
+        entry = dict(entry)
+        entry['min_ts'] = pd.Timestamp(entry['min_ts']) if entry.get('min_ts') else None
+        entry['max_ts'] = pd.Timestamp(entry['max_ts']) if entry.get('max_ts') else None
+        return entry
+
+    def assets(self):
+        return sorted(self._read())
+
+    def is_unchanged(self, filename, data):
+        """
+        Indica se `data` é idêntico à série registrada (mesmas colunas, número
+        de registros e checksum), caso em que a gravação pode ser pulada
+        """
+        if not isinstance(data.index, pd.DatetimeIndex) or data.empty:
+            return False
+        entry = self._read().get(dataset_name(filename))
+        if entry is None or entry.get('rows') != len(data):
+            return False
+        if entry.get('columns') != [str(column) for column in data.columns]:
+            return False
+        return entry.get('checksum') == f"{content_checksum(normalize_index(data)):016x}"
+
+    def record(self, filename, data, source=None, encoding=None):
+        """
+        Registra a série completa recém-gravada
+        `encoding` descreve as colunas gravadas de forma compacta (ver compact_frame)
+        """
+        if not isinstance(data.index, pd.DatetimeIndex) or data.empty:
+            return None
+        data = normalize_index(data)
+
+        with _lock:
+            assets = self._read()
+            previous = assets.get(dataset_name(filename), {})
+            entry = assets[dataset_name(filename)] = {
+                'min_ts': data.index.min().isoformat(),
+                'max_ts': data.index.max().isoformat(),
+                'rows': int(len(data)),
+                'freq': infer_frequency(data.index),
+                'source': source or previous.get('source'),
+                'columns': [str(column) for column in data.columns],
+                'checksum': f"{content_checksum(data):016x}",
+                'schema_version': SCHEMA_VERSION,
+                'updated_at': pd.Timestamp.now(tz='UTC').isoformat()
+            }
+            if encoding:
+                entry['encoding'] = encoding
+            self._write(assets)
+        return entry
+
+    def record_append(self, filename, new_data, source=None):
+        """
+        Atualiza a série após acrescentar `new_data` ao final (todas as datas
+        posteriores ao max_ts registrado). Retorna False se a entrada não
+        existe ou se o acréscimo não é puro, casos em que é preciso record().
+        """
+        with _lock:
+            assets = self._read()
+            entry = assets.get(dataset_name(filename))
+            if (entry is None or new_data.empty or
+                    new_data.index.min() <= pd.Timestamp(entry['max_ts'])):
+                return False
+
+            columns = entry.get('columns') or list(new_data.columns)
+            if not set(columns) <= set(new_data.columns):
+                return False
+            new_data = new_data[columns]
+
+            checksum = (int(entry['checksum'], 16) + content_checksum(new_data)) % 2**64
+            entry.update({
+                'max_ts': new_data.index.max().isoformat(),
+                'rows': int(entry['rows']) + len(new_data),
+                'freq': entry.get('freq') or infer_frequency(new_data.index),
+                'source': source or entry.get('source'),
+                'checksum': f"{checksum:016x}",
+                'updated_at': pd.Timestamp.now(tz='UTC').isoformat()
+            })
+            self._write(assets)
+        return True
+
+    def coverage(self, filename):
+        """(min_ts, max_ts) da série, sem abrir o arquivo de dados"""
+        entry = self.get(filename)
+        return (entry['min_ts'], entry['max_ts']) if entry else None
+
+    def overlap(self, filenames):
+        """Período comum a várias séries, (início, fim), ou None se alguma faltar/não houver interseção"""
+        ranges = [self.coverage(filename) for filename in filenames]
+        if not ranges or any(coverage is None for coverage in ranges):
+            return None
+        start = max(coverage[0] for coverage in ranges)
+        end = min(coverage[1] for coverage in ranges)
+        return (start, end) if start <= end else None
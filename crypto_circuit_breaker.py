@@ -0,0 +1,81 @@
+"""
+🔥 CriptoCaptorSmart - Circuit Breaker 🔥
+Abre o circuito de uma fonte de dados após falhas seguidas e rejeita chamadas
+imediatamente até o fim do cooldown, quando uma única chamada de teste é liberada
+"""
+
+import time
+import threading
+from crypto_config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS
+
+
+class CircuitOpenError(Exception):
+    """Chamada rejeitada porque o circuito da fonte está aberto (ou modo offline)"""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown_seconds=CIRCUIT_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            # Meio-aberto: apenas uma chamada de teste por vez
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def check(self):
+        """Como allow(), mas levanta CircuitOpenError quando a chamada é rejeitada"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} indisponível (circuit breaker aberto)")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🔌 Circuito de {self.name} aberto por {self.cooldown_seconds}s")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Retorna o circuit breaker compartilhado de uma fonte (criando se necessário)"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
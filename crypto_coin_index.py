@@ -0,0 +1,184 @@
+"""
+🔥 CriptoCaptorSmart - Índice Local de Moedas 🔥
+Cópia local da lista de moedas da CoinGecko com busca por prefixo (também
+em cada palavra do nome) e aproximada (nome, símbolo e id), sem chamadas à API
+"""
+
+import os
+import re
+import json
+import time
+import bisect
+import difflib
+import threading
+from collections import Counter
+
+# Busca aproximada: só as chaves que mais compartilham trigramas com a
+# consulta são comparadas pelo difflib
+NGRAM_SIZE = 3
+FUZZY_CANDIDATES = 200
+
+
+def _tokens(value):
+    """Palavras de um nome/id ('wrapped-bitcoin' -> ['wrapped', 'bitcoin'])"""
+    return [token for token in re.split(r'[^0-9a-z]+', value) if token]
+
+
+def _ngrams(value):
+    padded = f" {value} "
+    return {padded[start:start + NGRAM_SIZE] for start in range(max(1, len(padded) - NGRAM_SIZE + 1))}
+
+
+class CoinIndex:
+    """
+    Índice em memória da lista completa de moedas
+
+    A lista é persistida em `path` e recarregada em segundo plano por
+    `loader` (função que retorna dicts com id, symbol, name e
+    market_cap_rank) quando fica mais velha que `max_age_hours`.
+    """
+
+    def __init__(self, path, loader, max_age_hours=24):
+        self.path = path
+        self.loader = loader
+        self.max_age_seconds = max_age_hours * 3600
+        self.coins = []
+        self.updated_at = 0
+        self._keys = []      # (chave, posição em self.coins, chave inteira?), ordenado
+        self._positions = {}  # chave inteira -> posições
+        self._ngrams = {}     # trigrama -> chaves inteiras que o contêm
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    def __len__(self):
+        return len(self.coins)
+
+    def load(self):
+        """Carrega o índice salvo em disco (se existir)"""
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        self._build(saved.get('coins', []), saved.get('updated_at', 0))
+        return True
+
+    def _build(self, coins, updated_at):
+        """
+        Monta as chaves ordenadas da busca por prefixo (símbolo, id, nome e
+        cada palavra do nome/id) e o índice de trigramas da busca aproximada
+        """
+        keys, positions = [], {}
+        for position, coin in enumerate(coins):
+            for field in ('symbol', 'id', 'name'):
+                value = (coin.get(field) or '').lower()
+                if not value:
+                    continue
+                keys.append((value, position, True))
+                positions.setdefault(value, []).append(position)
+                if field != 'symbol':
+                    keys.extend((token, position, False) for token in _tokens(value) if token != value)
+        keys.sort()
+
+        ngrams = {}
+        for key in positions:
+            for gram in _ngrams(key):
+                ngrams.setdefault(gram, []).append(key)
+
+        with self._lock:
+            self.coins = coins
+            self._keys = keys
+            self._positions = positions
+            self._ngrams = ngrams
+            self.updated_at = updated_at
+
+    def is_stale(self):
+        return time.time() - self.updated_at > self.max_age_seconds
+
+    def refresh(self):
+        """Baixa a lista completa via `loader` e grava em disco"""
+        coins = self.loader()
+        if not coins:
+            return False
+
+        updated_at = time.time()
+        self._build(coins, updated_at)
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'updated_at': updated_at, 'coins': coins}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o índice de moedas: {e}")
+        return True
+
+    def refresh_in_background(self):
+        """Dispara refresh() em uma thread daemon, se o índice estiver velho"""
+        if not self.is_stale():
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+
+            def run():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ Falha ao atualizar o índice de moedas: {e}")
+
+            self._refresh_thread = threading.Thread(target=run, daemon=True)
+            self._refresh_thread.start()
+
+    def _prefix_matches(self, keys, prefix):
+        """
+        (exata, posição) das moedas com alguma chave ou palavra começando com
+        `prefix`; exata apenas quando a chave inteira é igual à consulta
+        """
+        start = bisect.bisect_left(keys, (prefix,))
+        positions = []
+        for key, position, whole in keys[start:]:
+            if not key.startswith(prefix):
+                break
+            positions.append((whole and key == prefix, position))
+        return positions
+
+    def _fuzzy_matches(self, positions, ngrams, query, limit):
+        """Aproximada: difflib sobre as chaves com mais trigramas em comum com a consulta"""
+        shared = Counter()
+        for gram in _ngrams(query):
+            shared.update(ngrams.get(gram, ()))
+        candidates = [key for key, _ in shared.most_common(FUZZY_CANDIDATES)]
+        close = difflib.get_close_matches(query, candidates, n=limit, cutoff=0.75)
+        return [(False, position) for key in close for position in positions[key]]
+
+    def search(self, query, limit=10):
+        """
+        Busca por prefixo em símbolo, id, nome e palavras do nome ("cash"
+        encontra Bitcoin Cash), com fallback aproximado (erros de digitação
+        em qualquer posição). Correspondências exatas vêm primeiro; dentro de
+        cada grupo, ordena por market_cap_rank (moedas sem rank por último).
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        with self._lock:
+            coins, keys, positions, ngrams = self.coins, self._keys, self._positions, self._ngrams
+
+        matches = self._prefix_matches(keys, query)
+
+        if not matches:
+            matches = self._fuzzy_matches(positions, ngrams, query, limit)
+
+        best = {}
+        for exact, position in matches:
+            best[position] = best.get(position, False) or exact
+
+        def rank_key(position):
+            rank = coins[position].get('market_cap_rank')
+            return (not best[position], rank is None, rank or 0)
+
+        return [dict(coins[position]) for position in sorted(best, key=rank_key)[:limit]]
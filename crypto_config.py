@@ -103,6 +103,14 @@ DATA_DIR = "data"
 CHARTS_DIR = "charts"
 LOGS_DIR = "logs"
 CACHE_DIR = "cache"
+BACKUP_DIR = "backups"
+
+# Armazenamento dos históricos: "parquet" (colunar, por moeda e ano), "sqlite"
+# (arquivo único, chave (moeda, data)) ou "csv"
+STORAGE_BACKEND = os.environ.get('CRIPTOCAPTOR_STORAGE', 'parquet')
+
+# Modo compacto (float32 / colunas derivadas não gravadas; ver COMPACT_COLUMNS em config.py)
+COMPACT_DTYPES = os.environ.get('CRIPTOCAPTOR_COMPACT', '').lower() in ('1', 'true', 'yes')
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 🔧 CONFIGURAÇÕES TÉCNICAS
@@ -116,10 +124,70 @@ MAX_CACHE_SIZE_MB = 100        # Máximo 100MB de cache
 API_RATE_LIMIT_CALLS = 100     # Máximo 100 calls por minuto
 API_RATE_LIMIT_WINDOW = 60     # Janela de 60 segundos
 
+# Limites por provedor (calls por minuto) usados pelo token bucket de cada host.
+# Hosts HTTP usam o hostname; exchanges do CCXT usam o id da exchange.
+API_HOST_RATE_LIMITS = {
+    'api.coingecko.com': 30,
+    'binance': 1200,
+    'coinbase': 600,
+    'kraken': 60,
+    'yfinance': 120
+}
+API_RATE_LIMIT_BURST_SECONDS = 5   # Rajada permitida (em segundos de tokens)
+API_MAX_RETRIES = 3                # Novas tentativas após HTTP 429
+API_BACKOFF_BASE_SECONDS = 1       # Backoff exponencial inicial
+API_BACKOFF_MAX_SECONDS = 120      # Backoff máximo
+
+# Configurações de coleta concorrente
+MAX_CONCURRENT_REQUESTS = 8    # Máximo de coletas simultâneas em collect_many
+
+# Candles por página no backfill paginado do CCXT (máximo aceito por exchange)
+CCXT_PAGE_LIMITS = {
+    'binance': 1000,
+    'coinbase': 300,
+    'kraken': 720
+}
+CCXT_DEFAULT_PAGE_LIMIT = 500
+
+# Fontes de dados históricos (exchanges são construídas apenas no primeiro uso)
+CCXT_EXCHANGES = ['binance', 'coinbase', 'kraken']
+MARKETS_CACHE_TTL_HOURS = 24    # Validade dos metadados de mercados em CACHE_DIR/markets
+
+# Snapshot de mercado em lote (máximo de ids por chamada da CoinGecko)
+MARKETS_BATCH_SIZE = 250
+
+# Índice local de moedas usado pela busca
+COIN_INDEX_REFRESH_HOURS = 24   # Idade máxima antes de atualizar em segundo plano
+COIN_INDEX_RANKED_PAGES = 4     # Páginas de 250 moedas de /coins/markets com market_cap_rank
+CCXT_QUOTE_CURRENCIES = ['USDT', 'USD']   # Apenas cotações em dólar (preços comparáveis ao CoinGecko)
+SOURCE_HEDGE_DELAY_SECONDS = 3  # Espera pelo CoinGecko antes de disparar as alternativas
+SOURCE_RACE_MAX_WORKERS = 3     # Fontes alternativas consultadas ao mesmo tempo por moeda
+
 # Configurações de timeout
 REQUEST_TIMEOUT = 30           # Timeout de 30 segundos para requests
 CONNECTION_TIMEOUT = 10        # Timeout de conexão de 10 segundos
 
+# Transporte HTTP compartilhado pelos coletores (pool de conexões keep-alive)
+HTTP_POOL_CONNECTIONS = 10                 # Hosts com pool mantido em cache
+HTTP_POOL_MAXSIZE = MAX_CONCURRENT_REQUESTS * 2   # Conexões reutilizáveis por host
+HTTP_RETRY_CONNECT = 1                     # Novas tentativas só em falha de conexão (5xx, timeouts e 429
+                                           # sobem para o rate limiter e o circuit breaker)
+HTTP_RETRY_BACKOFF = 0.5                   # Backoff entre tentativas de conexão
+HTTP_USER_AGENT = 'CriptoCaptorSmart/1.0 (https://github.com/crypto-analysis)'
+
+# Circuit breaker por fonte de dados (CoinGecko, cada exchange, yfinance)
+CIRCUIT_FAILURE_THRESHOLD = 3  # Falhas seguidas para abrir o circuito
+CIRCUIT_COOLDOWN_SECONDS = 60  # Tempo com o circuito aberto antes de testar de novo
+
+# Modo offline: usa apenas dados locais (cache e arquivos em DATA_DIR)
+OFFLINE_MODE = os.environ.get('CRIPTOCAPTOR_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# Log append-only de ticks/barras em tempo real (DATA_DIR/ticks)
+TICK_SEGMENT_MAX_BYTES = 8 * 1024 * 1024    # Tamanho máximo de cada segmento
+TICK_FSYNC_BATCH = 256                      # fsync a cada N registros...
+TICK_FSYNC_INTERVAL_SECONDS = 1.0           # ...ou a cada N segundos
+TICK_COMPACTION_INTERVAL_SECONDS = 300      # Compactação para o histórico
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 📊 CRIPTOMOEDAS POPULARES PRÉ-CONFIGURADAS
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -206,10 +274,10 @@ LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_FILE = "crypto_captor.log"
 
-# Configurações de backup
+# Configurações de backup (snapshots deduplicados de DATA_DIR em BACKUP_DIR)
 AUTO_BACKUP = True
 BACKUP_INTERVAL_HOURS = 24
-MAX_BACKUP_FILES = 7
+MAX_BACKUP_FILES = 7           # Snapshots mantidos
 
 def ensure_directories():
     """Garante que todos os diretórios necessários existem"""
@@ -0,0 +1,244 @@
+"""
+🔥 CriptoCaptorSmart - Motor de Correlação N x N 🔥
+Matrizes de correlação (estática e móvel) de todo o universo em uma passada
+vetorizada sobre um painel de retornos alinhado, com dados faltantes tratados
+par a par (cada par usa apenas as datas em que as duas moedas têm valor),
+e correlação cruzada por FFT para varreduras de lags longas
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import fft
+from crypto_config import CORRELATION_WINDOW
+
+# Faixa de confiança de 95% para correlação nula: ±1.96 / sqrt(n)
+CONFIDENCE_Z = 1.96
+
+
+class _CrossSums:
+    """
+    Somas de produtos cruzados de um bloco de linhas (T, N), par a par
+
+    n[i, j]   = datas com i e j válidos
+    sx[i, j]  = soma de x_i nessas datas (sy é a transposta)
+    sxx[i, j] = soma de x_i² nessas datas (syy é a transposta)
+    sxy[i, j] = soma de x_i * x_j
+    """
+
+    def __init__(self, size):
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+
+    def add(self, values, mask):
+        """Acumula linhas (valores com zero onde inválido, máscara em float)"""
+        if len(values):
+            self.n += mask.T @ mask
+            self.sx += values.T @ mask
+            self.sxx += (values * values).T @ mask
+            self.sxy += values.T @ values
+
+    def __sub__(self, other):
+        result = _CrossSums(0)
+        result.n = self.n - other.n
+        result.sx = self.sx - other.sx
+        result.sxx = self.sxx - other.sxx
+        result.sxy = self.sxy - other.sxy
+        return result
+
+    def correlation(self, min_periods):
+        """Pearson par a par a partir das somas; NaN com menos de min_periods datas"""
+        n, sx, sxx, sxy = self.n, self.sx, self.sxx, self.sxy
+        sy, syy = sx.T, sxx.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = sxy - sx * sy / n
+            variance_x = sxx - sx * sx / n
+            variance_y = syy - sy * sy / n
+            result = covariance / np.sqrt(variance_x * variance_y)
+        invalid = (np.rint(n) < max(min_periods, 2)) | ~(variance_x > 0) | ~(variance_y > 0)
+        result[invalid] = np.nan
+        return np.clip(result, -1.0, 1.0)
+
+
+def _prepare(returns):
+    """
+    Valores centrados (média de cada coluna) com zero nos faltantes e a
+    máscara de validade em float; centrar não muda a correlação e evita
+    cancelamento numérico nas somas
+    """
+    values = np.asarray(returns, dtype='float64')
+    if values.ndim == 1:
+        values = values[:, None]
+    valid = np.isfinite(values)
+    means = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    return np.where(valid, values - means, 0.0), valid.astype('float64')
+
+
+def correlation_matrix(returns, min_periods=2):
+    """
+    Matriz de correlação (N, N) de um array/DataFrame de retornos (T, N)
+    NaN marca dado faltante; cada par usa as datas em que ambos existem.
+    """
+    values, mask = _prepare(returns)
+    sums = _CrossSums(values.shape[1])
+    sums.add(values, mask)
+    result = sums.correlation(min_periods)
+    if isinstance(returns, pd.DataFrame):
+        return pd.DataFrame(result, index=returns.columns, columns=returns.columns)
+    return result
+
+
+def _window_ends(rows, window, step):
+    return np.arange(window - 1, rows, max(1, step))
+
+
+def iter_rolling_correlation(returns, window=CORRELATION_WINDOW, min_periods=None, step=1):
+    """
+    Matrizes de correlação móveis uma a uma: gera (posição final, matriz (N, N))
+    para janelas de `window` linhas terminando a cada `step` linhas (a
+    primeira em window - 1), com apenas uma matriz em memória por vez
+
+    As somas de cada janela são a diferença entre duas somas acumuladas que
+    só avançam no tempo, então o custo total é O(T x N²) independente da
+    janela.
+    """
+    values, mask = _prepare(returns)
+    rows, size = values.shape
+    min_periods = window if min_periods is None else min_periods
+
+    upper, lower = _CrossSums(size), _CrossSums(size)
+    upper_position = lower_position = 0
+    for end in _window_ends(rows, window, step):
+        stop = end + 1
+        start = stop - window
+        upper.add(values[upper_position:stop], mask[upper_position:stop])
+        lower.add(values[lower_position:start], mask[lower_position:start])
+        upper_position, lower_position = stop, start
+        yield int(end), (upper - lower).correlation(min_periods)
+
+
+def rolling_correlation_matrix(returns, window=CORRELATION_WINDOW, min_periods=None, step=1):
+    """
+    Matrizes de correlação móveis, (K, N, N); ver iter_rolling_correlation
+    O cubo ocupa K x N² x 8 bytes: para universos grandes, prefira o gerador
+    ou um `step` maior. Retorna (posições finais das janelas, matrizes).
+    """
+    values = np.asarray(returns, dtype='float64')
+    rows, size = (len(values), 1) if values.ndim == 1 else values.shape
+    ends = _window_ends(rows, window, step)
+    result = np.full((len(ends), size, size), np.nan)
+    for position, (_, matrix) in enumerate(iter_rolling_correlation(values, window, min_periods, step)):
+        result[position] = matrix
+    return ends, result
+
+
+def panel_correlation(panel, field='price', min_periods=2):
+    """Correlação dos retornos de todas as moedas de um MarketPanel (DataFrame N x N)"""
+    result = correlation_matrix(panel.returns(field), min_periods)
+    return pd.DataFrame(result, index=panel.coins, columns=panel.coins)
+
+
+def panel_rolling_correlation(panel, window=CORRELATION_WINDOW, field='price', min_periods=None, step=1):
+    """Correlações móveis dos retornos de um MarketPanel: (datas finais das janelas, (K, N, N))"""
+    ends, result = rolling_correlation_matrix(panel.returns(field), window, min_periods, step)
+    return panel.dates[ends], result
+
+
+def panel_iter_rolling_correlation(panel, window=CORRELATION_WINDOW, field='price', min_periods=None, step=1):
+    """Correlações móveis dos retornos de um MarketPanel, uma janela por vez: gera (data final, (N, N))"""
+    for end, matrix in iter_rolling_correlation(panel.returns(field), window, min_periods, step):
+        yield panel.dates[end], matrix
+
+
+def top_pairs(matrix, count=10):
+    """Pares (moeda_a, moeda_b, correlação) mais correlacionados em valor absoluto"""
+    values = matrix.to_numpy()
+    first, second = np.triu_indices(len(values), k=1)
+    correlations = values[first, second]
+    order = np.argsort(-np.abs(np.nan_to_num(correlations, nan=0.0)), kind='stable')[:count]
+    return [(matrix.index[first[k]], matrix.columns[second[k]], float(correlations[k]))
+            for k in order if np.isfinite(correlations[k])]
+
+
+def cross_correlation(x, y, max_lag=None, min_periods=3):
+    """
+    Correlação cruzada normalizada de todos os lags via FFT, O(n log n)
+
+    corr[k] = Pearson(x_t, y_{t+k}) sobre os pares em que ambos existem
+    (NaN = faltante), para k em [-max_lag, max_lag]. x e y podem ser (n,)
+    ou (P, n) para P pares de uma vez. As seis somas de cada lag (contagem,
+    somas, quadrados e produto) são correlações cruzadas das séries e de
+    suas máscaras, todas calculadas no domínio da frequência.
+    Retorna (lags, correlações, pares por lag).
+    """
+    x = np.atleast_2d(np.asarray(x, dtype='float64'))
+    y = np.atleast_2d(np.asarray(y, dtype='float64'))
+    length = x.shape[-1]
+    max_lag = length - 1 if max_lag is None else min(int(max_lag), length - 1)
+
+    x, mask_x = _prepare(x.T)
+    y, mask_y = _prepare(y.T)
+    x, mask_x, y, mask_y = x.T, mask_x.T, y.T, mask_y.T
+
+    size = fft.next_fast_len(2 * length - 1, real=True)
+    spectrum = lambda values: fft.rfft(values, size, axis=-1)
+    fx, fxx, fmx = spectrum(x), spectrum(x * x), spectrum(mask_x)
+    fy, fyy, fmy = spectrum(y), spectrum(y * y), spectrum(mask_y)
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    positions = lags % size
+
+    def correlate(first, second):
+        # sum_t a_t * b_{t+k}, com k negativo no final do buffer circular
+        return fft.irfft(np.conj(first) * second, size, axis=-1)[..., positions]
+
+    n = np.rint(correlate(fmx, fmy))
+    sx, sy = correlate(fx, fmy), correlate(fmx, fy)
+    sxx, syy = correlate(fxx, fmy), correlate(fmx, fyy)
+    sxy = correlate(fx, fy)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sxy - sx * sy / n
+        variance_x = sxx - sx * sx / n
+        variance_y = syy - sy * sy / n
+        result = covariance / np.sqrt(variance_x * variance_y)
+    # Resíduos de arredondamento da FFT ficam na ordem de 1e-12 da escala das somas
+    tolerance = 1e-12 * np.maximum(sxx.max(axis=-1, keepdims=True), syy.max(axis=-1, keepdims=True))
+    invalid = (n < max(min_periods, 2)) | ~(variance_x > tolerance) | ~(variance_y > tolerance)
+    result[invalid] = np.nan
+    return lags, np.clip(result, -1.0, 1.0), n.astype('int64')
+
+
+def lag_scan(x, y, max_lag=None, min_periods=3):
+    """
+    Varredura de lags de um par (ou P pares): correlações por lag, faixa de
+    confiança ±CONFIDENCE_Z/sqrt(n_k) e o lag de pico
+
+    O pico é o lag de maior |correlação| / faixa, para que lags extremos,
+    com poucos pares, não vençam por ruído. Lag positivo: y reage a x com
+    k períodos de atraso.
+    """
+    lags, correlations, counts = cross_correlation(x, y, max_lag, min_periods)
+    with np.errstate(divide='ignore'):
+        band = CONFIDENCE_Z / np.sqrt(counts)
+
+    scores = np.where(np.isfinite(correlations), np.abs(correlations) / band, -1.0)
+    peak = scores.argmax(axis=-1)
+    rows = np.arange(len(correlations))
+    peak_correlation = correlations[rows, peak]
+    result = {
+        'lags': lags,
+        'correlations': correlations,
+        'counts': counts,
+        'confidence_band': band,
+        'peak_lag': lags[peak],
+        'peak_correlation': peak_correlation,
+        'significant': np.abs(np.nan_to_num(peak_correlation)) > band[rows, peak]
+    }
+    if np.ndim(x) == 1:
+        result = {key: value[0] if key != 'lags' else value for key, value in result.items()}
+        result['peak_lag'] = int(result['peak_lag'])
+        result['peak_correlation'] = float(result['peak_correlation'])
+        result['significant'] = bool(result['significant'])
+    return result
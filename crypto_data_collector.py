@@ -3,73 +3,320 @@
 Coletor de dados históricos para qualquer criptomoeda
 """
 
+import asyncio
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import threading
 import time
-import ccxt
-import yfinance as yf
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 import json
 import numpy as np
 from tqdm import tqdm
 from crypto_config import (
-    COINGECKO_API_BASE, POPULAR_CRYPTOS, DATA_DIR,
-    CACHE_DURATION_MINUTES, REQUEST_TIMEOUT, API_RATE_LIMIT_CALLS
+    COINGECKO_API_BASE, POPULAR_CRYPTOS, DATA_DIR, CACHE_DIR,
+    CACHE_DURATION_MINUTES, API_MAX_RETRIES,
+    MAX_CONCURRENT_REQUESTS, CCXT_PAGE_LIMITS, CCXT_DEFAULT_PAGE_LIMIT,
+    CCXT_EXCHANGES, CCXT_QUOTE_CURRENCIES, MARKETS_CACHE_TTL_HOURS,
+    MARKETS_BATCH_SIZE, SOURCE_HEDGE_DELAY_SECONDS, SOURCE_RACE_MAX_WORKERS, COIN_INDEX_REFRESH_HOURS,
+    COIN_INDEX_RANKED_PAGES, OFFLINE_MODE, STORAGE_BACKEND, COMPACT_DTYPES
 )
+from crypto_cache import ResponseCache, SourceResolutionCache
+from crypto_rate_limiter import rate_limiter, parse_retry_after
+from crypto_coin_index import CoinIndex
+from crypto_circuit_breaker import CircuitOpenError, get_breaker
+from crypto_http import get_shared_session, create_pooled_session
+from crypto_singleflight import inflight
+from utils import get_last_timestamp, append_data, save_data, load_data, closed_bars
 import os
+import shutil
+
+class FetchCancelled(Exception):
+    """Coleta interrompida antes de uma chamada de rede: outra fonte já venceu a corrida"""
+
+
+class BackfillIncomplete(Exception):
+    """Backfill com páginas que falharam ou vieram vazias; `data` tem os candles obtidos"""
+
+    def __init__(self, symbol, missing_pages, data=None):
+        super().__init__(f"Backfill de {symbol} incompleto: {len(missing_pages)} páginas sem dados")
+        self.missing_pages = missing_pages
+        self.data = data
+
+
+def parse_market_chart(data):
+    """
+    Converte a resposta de /coins/{id}/market_chart em DataFrame (vetorizado)
+
+    Os timestamps são convertidos de uma só vez e as séries de volume e market
+    cap são alinhadas às de preço pelo timestamp, não pela posição. Valores
+    ausentes viram 0, como no parser original.
+    """
+    def to_series(key):
+        values = np.asarray(data.get(key) or [], dtype='float64').reshape(-1, 2)
+        series = pd.Series(values[:, 1], index=values[:, 0].astype('int64'))
+        return series[~series.index.duplicated(keep='last')]
+
+    prices = to_series('prices')
+    if prices.empty:
+        return None
+
+    df = pd.DataFrame({
+        'price': prices,
+        'volume': to_series('total_volumes').reindex(prices.index).fillna(0),
+        'market_cap': to_series('market_caps').reindex(prices.index).fillna(0)
+    })
+    df.index = pd.to_datetime(df.index, unit='ms')
+    df.index.name = 'date'
+    return df.sort_index()
 
 class UniversalCryptoCollector:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'CriptoCaptorSmart/1.0 (https://github.com/crypto-analysis)'
-        })
-        self.cache = {}
-        self.rate_limit_calls = 0
-        self.rate_limit_reset = time.time() + 60
-
-        # Inicializa exchanges do CCXT
+    def __init__(self, offline=OFFLINE_MODE):
+        # Modo offline: nenhuma chamada de rede; usa cache (mesmo expirado) e CSVs locais
+        self.offline = offline
+        self.session = get_shared_session()
+        self.cache = ResponseCache()
+        self.source_cache = SourceResolutionCache()
+        self.last_sources = {}
+        # Por thread: função que indica se a coleta em andamento foi cancelada
+        self._local = threading.local()
+        self.rate_limiter = rate_limiter
+        self.coin_index = CoinIndex(
+            os.path.join(CACHE_DIR, 'coin_index.json'), self._fetch_coin_list,
+            max_age_hours=COIN_INDEX_REFRESH_HOURS
+        )
+        self._coin_index_loaded = False
+
+        # Exchanges do CCXT são construídas apenas no primeiro uso
         self.exchanges = {}
-        try:
-            self.exchanges['binance'] = ccxt.binance()
-        except:
-            pass
-        try:
-            self.exchanges['coinbase'] = ccxt.coinbase()
-        except:
-            pass
-        try:
-            self.exchanges['kraken'] = ccxt.kraken()
-        except:
-            pass
+        self._exchanges_lock = threading.Lock()
+        self._markets_locks = {exchange: threading.Lock() for exchange in CCXT_EXCHANGES}
 
-    def _check_rate_limit(self):
-        """Verifica e respeita rate limits"""
-        current_time = time.time()
-
-        if current_time > self.rate_limit_reset:
-            self.rate_limit_calls = 0
-            self.rate_limit_reset = current_time + 60
+    def _get_exchange(self, exchange):
+        """Retorna a exchange do CCXT, construindo-a no primeiro uso (None se não suportada)"""
+        if exchange not in CCXT_EXCHANGES:
+            return None
 
-        if self.rate_limit_calls >= API_RATE_LIMIT_CALLS:
-            sleep_time = self.rate_limit_reset - current_time
-            if sleep_time > 0:
-                print(f"⏳ Rate limit atingido. Aguardando {sleep_time:.1f}s...")
-                time.sleep(sleep_time)
-                self.rate_limit_calls = 0
-                self.rate_limit_reset = time.time() + 60
+        with self._exchanges_lock:
+            if exchange not in self.exchanges:
+                import ccxt
+                try:
+                    # Reaproveita o pool de conexões compartilhado, mas com cookies
+                    # próprios: o CCXT limpa os cookies da sessão a cada requisição
+                    self.exchanges[exchange] = getattr(ccxt, exchange)({'session': create_pooled_session()})
+                except Exception as e:
+                    print(f"❌ Não foi possível inicializar {exchange}: {e}")
+                    return None
+            return self.exchanges[exchange]
+
+    def _load_markets(self, exchange):
+        """
+        Garante os metadados de mercados da exchange, usando o cache em disco
+        (CACHE_DIR/markets) enquanto estiver dentro de MARKETS_CACHE_TTL_HOURS.
+        Retorna False se os mercados não puderem ser obtidos.
+        """
+        exchange_obj = self._get_exchange(exchange)
+        if exchange_obj is None:
+            return False
+
+        with self._markets_locks[exchange]:
+            if exchange_obj.markets:
+                return True
+
+            path = os.path.join(CACHE_DIR, 'markets', f"{exchange}.json")
+            try:
+                if time.time() - os.path.getmtime(path) < MARKETS_CACHE_TTL_HOURS * 3600:
+                    with open(path, 'r') as f:
+                        cached = json.load(f)
+                    exchange_obj.set_markets(cached['markets'], cached.get('currencies'))
+                    return True
+            except (OSError, ValueError, KeyError):
+                pass
+
+            if self.offline:
+                return False
+
+            import ccxt
+            self._check_cancelled()
+            breaker = get_breaker(f"ccxt:{exchange}")
+            try:
+                breaker.check()
+                exchange_obj.load_markets()
+            except Exception as e:
+                if isinstance(e, ccxt.NetworkError):
+                    breaker.record_failure()
+                elif not isinstance(e, CircuitOpenError):
+                    breaker.record_success()
+                print(f"⚠️ Não foi possível carregar mercados de {exchange}: {e}")
+                return False
+            breaker.record_success()
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({'markets': exchange_obj.markets, 'currencies': exchange_obj.currencies}, f, default=str)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"⚠️ Não foi possível gravar cache de mercados de {exchange}: {e}")
+            return True
+
+    def has_symbol(self, exchange, symbol):
+        """
+        Verifica se a exchange lista o par, sem ida à rede quando os mercados
+        estão em cache. Na dúvida (mercados indisponíveis) retorna True.
+        """
+        if not self._load_markets(exchange):
+            return self._get_exchange(exchange) is not None
+        return symbol in self.exchanges[exchange].markets
+
+    def _check_cancelled(self):
+        """Levanta FetchCancelled se a coleta desta thread foi cancelada (ver _race_sources)"""
+        cancelled = getattr(self._local, 'cancelled', None)
+        if cancelled is not None and cancelled():
+            raise FetchCancelled("coleta cancelada: outra fonte já venceu")
+
+    def cache_summary(self):
+        """Linha com as taxas de acerto e falha do cache de respostas"""
+        stats = self.cache.stats()
+        return (f"{stats['hits']} acertos ({stats['hit_rate']:.0%}), {stats['misses']} falhas "
+                f"({stats['miss_rate']:.0%}), {stats['entries']} entradas, {stats['size_mb']:.1f} MB")
+
+    def report_cache_stats(self):
+        """Exibe as estatísticas do cache de respostas"""
+        print(f"💾 Cache: {self.cache_summary()}")
+
+    def _cache_get(self, key):
+        """Lê do cache de respostas; no modo offline aceita entradas expiradas"""
+        return self.cache.get(key, allow_stale=self.offline)
+
+    def _api_get(self, url, params=None):
+        """
+        GET respeitando o rate limit do host, com backoff em HTTP 429
+
+        Erros de rede e HTTP 5xx contam como falha no circuit breaker do host;
+        com o circuito aberto (ou no modo offline) levanta CircuitOpenError
+        sem tocar a rede.
+        """
+        host = urlparse(url).netloc
+        if self.offline:
+            raise CircuitOpenError(f"{host} indisponível (modo offline)")
+        breaker = get_breaker(host)
+
+        for attempt in range(API_MAX_RETRIES + 1):
+            self._check_cancelled()
+            breaker.check()
+            self.rate_limiter.acquire(host)
+            self._check_cancelled()
+            try:
+                response = self.session.get(url, params=params)
+            except requests.RequestException:
+                breaker.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+                return response
+            breaker.record_success()
+
+            if response.status_code != 429:
+                self.rate_limiter.record_success(host)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            delay = self.rate_limiter.penalize(host, retry_after)
+            if attempt < API_MAX_RETRIES:
+                print(f"⏳ Rate limit de {host} (HTTP 429). Nova tentativa em {delay:.1f}s...")
+
+        return response
+
+    def _fetch_ohlcv(self, exchange_obj, exchange, symbol, timeframe, since=None, limit=None):
+        """fetch_ohlcv respeitando o rate limit da exchange, com backoff em bloqueios"""
+        import ccxt
+
+        if self.offline:
+            raise CircuitOpenError(f"{exchange} indisponível (modo offline)")
+        breaker = get_breaker(f"ccxt:{exchange}")
+
+        for attempt in range(API_MAX_RETRIES + 1):
+            self._check_cancelled()
+            breaker.check()
+            self.rate_limiter.acquire(exchange)
+            self._check_cancelled()
+            try:
+                ohlcv = exchange_obj.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+                # Bloqueio por rate limit não indica fonte fora do ar
+                breaker.record_success()
+                if attempt == API_MAX_RETRIES:
+                    raise
+                delay = self.rate_limiter.penalize(exchange)
+                print(f"⏳ Rate limit de {exchange}. Nova tentativa em {delay:.1f}s...")
+                continue
+            except ccxt.NetworkError:
+                breaker.record_failure()
+                raise
+            except Exception:
+                breaker.record_success()
+                raise
+
+            breaker.record_success()
+            self.rate_limiter.record_success(exchange)
+            return ohlcv
+
+    def _fetch_coin_list(self):
+        """
+        Lista completa de moedas (/coins/list) com market_cap_rank das
+        primeiras COIN_INDEX_RANKED_PAGES páginas de /coins/markets
+        """
+        response = self._api_get(f"{COINGECKO_API_BASE}/coins/list")
+        if response.status_code != 200:
+            print(f"❌ Erro ao baixar lista de moedas: {response.status_code}")
+            return []
 
-        self.rate_limit_calls += 1
+        ranks = {}
+        for page in range(1, COIN_INDEX_RANKED_PAGES + 1):
+            params = {'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': page}
+            ranked = self._api_get(f"{COINGECKO_API_BASE}/coins/markets", params=params)
+            if ranked.status_code != 200:
+                break
+            for coin in ranked.json():
+                ranks[coin.get('id')] = coin.get('market_cap_rank')
+
+        return [{
+            'id': coin.get('id'),
+            'symbol': (coin.get('symbol') or '').upper(),
+            'name': coin.get('name'),
+            'market_cap_rank': ranks.get(coin.get('id'))
+        } for coin in response.json()]
 
     def search_crypto(self, query):
-        """Busca criptomoedas por nome ou símbolo"""
-        self._check_rate_limit()
+        """
+        Busca criptomoedas por nome ou símbolo
+
+        Usa o índice local de moedas (atualizado em segundo plano); a API
+        /search só é consultada enquanto o índice ainda não existe.
+        """
+        if not self._coin_index_loaded:
+            self.coin_index.load()
+            self._coin_index_loaded = True
+        if not self.offline:
+            self.coin_index.refresh_in_background()
+
+        if len(self.coin_index):
+            return self.coin_index.search(query)
+
+        cache_key = ('search', query.strip().lower())
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
         try:
             url = f"{COINGECKO_API_BASE}/search"
             params = {'query': query}
 
-            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response = self._api_get(url, params=params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -84,6 +331,8 @@ class UniversalCryptoCollector:
                         'market_cap_rank': coin.get('market_cap_rank')
                     })
 
+                if results:
+                    self.cache.set(cache_key, results)
                 return results
             else:
                 print(f"❌ Erro na busca: {response.status_code}")
@@ -94,8 +343,18 @@ class UniversalCryptoCollector:
             return []
 
     def get_crypto_info(self, crypto_id):
-        """Obtém informações básicas de uma criptomoeda"""
-        self._check_rate_limit()
+        """
+        Obtém informações básicas de uma criptomoeda
+
+        Chamadas concorrentes para a mesma moeda compartilham uma única busca.
+        """
+        return inflight.do(('info', crypto_id, self.offline), self._get_crypto_info, crypto_id)
+
+    def _get_crypto_info(self, crypto_id):
+        cache_key = ('info', crypto_id)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
         try:
             url = f"{COINGECKO_API_BASE}/coins/{crypto_id}"
@@ -107,7 +366,7 @@ class UniversalCryptoCollector:
                 'developer_data': 'false'
             }
 
-            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response = self._api_get(url, params=params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -124,6 +383,7 @@ class UniversalCryptoCollector:
                     'description': data.get('description', {}).get('en', '')[:200] + '...'
                 }
 
+                self.cache.set(cache_key, info)
                 return info
             else:
                 print(f"❌ Erro ao obter informações: {response.status_code}")
@@ -133,9 +393,105 @@ class UniversalCryptoCollector:
             print(f"❌ Erro ao obter informações da criptomoeda: {e}")
             return None
 
-    def get_historical_data_coingecko(self, crypto_id, days=365):
+    def _fetch_markets_batch(self, ids):
+        """Uma chamada a /coins/markets para até MARKETS_BATCH_SIZE ids"""
+        url = f"{COINGECKO_API_BASE}/coins/markets"
+        params = {
+            'vs_currency': 'usd',
+            'ids': ','.join(ids),
+            'per_page': MARKETS_BATCH_SIZE,
+            'page': 1,
+            'sparkline': 'false'
+        }
+
+        response = self._api_get(url, params=params)
+        if response.status_code != 200:
+            print(f"❌ Erro em /coins/markets: {response.status_code}")
+            return []
+
+        return [{
+            'id': coin.get('id'),
+            'symbol': (coin.get('symbol') or '').upper(),
+            'name': coin.get('name'),
+            'current_price': coin.get('current_price'),
+            'market_cap': coin.get('market_cap'),
+            'market_cap_rank': coin.get('market_cap_rank'),
+            'total_volume': coin.get('total_volume'),
+            'price_change_24h': coin.get('price_change_percentage_24h')
+        } for coin in response.json()]
+
+    def _fetch_simple_price_batch(self, ids):
+        """Uma chamada a /simple/price para ids ausentes de /coins/markets"""
+        url = f"{COINGECKO_API_BASE}/simple/price"
+        params = {
+            'ids': ','.join(ids),
+            'vs_currencies': 'usd',
+            'include_market_cap': 'true',
+            'include_24hr_vol': 'true',
+            'include_24hr_change': 'true'
+        }
+
+        response = self._api_get(url, params=params)
+        if response.status_code != 200:
+            print(f"❌ Erro em /simple/price: {response.status_code}")
+            return []
+
+        return [{
+            'id': crypto_id,
+            'current_price': quote.get('usd'),
+            'market_cap': quote.get('usd_market_cap'),
+            'total_volume': quote.get('usd_24h_vol'),
+            'price_change_24h': quote.get('usd_24h_change')
+        } for crypto_id, quote in response.json().items()]
+
+    def get_market_snapshot(self, ids):
+        """
+        Cotações de várias criptomoedas em poucas chamadas
+
+        Agrupa os ids em lotes de MARKETS_BATCH_SIZE para /coins/markets; ids que
+        não aparecem ali são consultados em lote via /simple/price. Retorna um
+        DataFrame indexado por id, na ordem pedida, com as mesmas métricas de
+        get_crypto_info.
+        """
+        ids = list(dict.fromkeys(ids))
+        columns = ['symbol', 'name', 'current_price', 'market_cap', 'market_cap_rank',
+                   'total_volume', 'price_change_24h']
+        rows = []
+
+        try:
+            for start in range(0, len(ids), MARKETS_BATCH_SIZE):
+                batch = ids[start:start + MARKETS_BATCH_SIZE]
+                cache_key = ('markets_snapshot', tuple(batch))
+                batch_rows = self._cache_get(cache_key)
+
+                if batch_rows is None:
+                    batch_rows = self._fetch_markets_batch(batch)
+                    found = {row['id'] for row in batch_rows}
+                    missing = [crypto_id for crypto_id in batch if crypto_id not in found]
+                    if missing:
+                        batch_rows += self._fetch_simple_price_batch(missing)
+                    if batch_rows:
+                        self.cache.set(cache_key, batch_rows)
+
+                rows.extend(batch_rows)
+
+        except Exception as e:
+            print(f"❌ Erro ao obter snapshot de mercado: {e}")
+
+        snapshot = pd.DataFrame(rows, columns=['id'] + columns).set_index('id')
+        snapshot = snapshot[~snapshot.index.duplicated(keep='first')]
+        return snapshot.reindex([crypto_id for crypto_id in ids if crypto_id in snapshot.index])
+
+    def get_historical_data_coingecko(self, crypto_id, days=365, interval=None):
         """Coleta dados históricos via CoinGecko"""
-        self._check_rate_limit()
+        if interval is None:
+            interval = 'daily' if days > 90 else 'hourly'
+
+        cache_key = ('coingecko_history', crypto_id, days, interval)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            print(f"⚡ Cache: {len(cached)} registros para {crypto_id}")
+            return cached
 
         try:
             print(f"📊 Coletando dados históricos para {crypto_id} ({days} dias)...")
@@ -144,41 +500,19 @@ class UniversalCryptoCollector:
             params = {
                 'vs_currency': 'usd',
                 'days': days,
-                'interval': 'daily' if days > 90 else 'hourly'
+                'interval': interval
             }
 
-            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            response = self._api_get(url, params=params)
 
             if response.status_code == 200:
-                data = response.json()
-
-                # Processa dados
-                prices = data.get('prices', [])
-                volumes = data.get('total_volumes', [])
-                market_caps = data.get('market_caps', [])
+                df = parse_market_chart(response.json())
 
-                if not prices:
+                if df is None:
                     print(f"❌ Nenhum dado de preço encontrado para {crypto_id}")
                     return None
 
-                # Converte para DataFrame
-                df_data = []
-                for i, (timestamp, price) in enumerate(prices):
-                    date = pd.to_datetime(timestamp, unit='ms')
-                    volume = volumes[i][1] if i < len(volumes) else 0
-                    market_cap = market_caps[i][1] if i < len(market_caps) else 0
-
-                    df_data.append({
-                        'date': date,
-                        'price': price,
-                        'volume': volume,
-                        'market_cap': market_cap
-                    })
-
-                df = pd.DataFrame(df_data)
-                df.set_index('date', inplace=True)
-                df = df.sort_index()
-
+                self.cache.set(cache_key, df)
                 print(f"✅ Coletados {len(df)} registros para {crypto_id}")
                 return df
 
@@ -186,6 +520,8 @@ class UniversalCryptoCollector:
                 print(f"❌ Erro na API CoinGecko: {response.status_code}")
                 return None
 
+        except FetchCancelled:
+            raise
         except Exception as e:
             print(f"❌ Erro ao coletar dados do CoinGecko: {e}")
             return None
@@ -193,44 +529,182 @@ class UniversalCryptoCollector:
     def get_historical_data_ccxt(self, symbol, exchange='binance', timeframe='1d', limit=365):
         """Coleta dados históricos via CCXT"""
         try:
-            if exchange not in self.exchanges:
+            cache_key = ('ccxt_ohlcv', exchange, symbol, timeframe, limit)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                print(f"⚡ Cache: {len(cached)} registros para {symbol} via {exchange}")
+                return cached
+
+            exchange_obj = self._get_exchange(exchange)
+            if exchange_obj is None:
                 print(f"❌ Exchange {exchange} não suportada")
                 return None
 
-            exchange_obj = self.exchanges[exchange]
-
             if not exchange_obj.has['fetchOHLCV']:
                 print(f"❌ Exchange {exchange} não suporta OHLCV")
                 return None
 
+            if not self.has_symbol(exchange, symbol):
+                print(f"❌ {symbol} não listado em {exchange}")
+                return None
+
             print(f"📊 Coletando dados de {symbol} via {exchange}...")
 
             # Busca dados OHLCV
-            ohlcv = exchange_obj.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = self._fetch_ohlcv(exchange_obj, exchange, symbol, timeframe, limit=limit)
 
             if not ohlcv:
                 print(f"❌ Nenhum dado encontrado para {symbol}")
                 return None
 
-            # Converte para DataFrame
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('date', inplace=True)
-            df.drop('timestamp', axis=1, inplace=True)
-
-            # Renomeia colunas para padronizar
-            df.rename(columns={'close': 'price'}, inplace=True)
-            df['market_cap'] = 0  # CCXT não fornece market cap diretamente
+            df = self._ohlcv_to_frame(ohlcv)
 
+            self.cache.set(cache_key, df)
             print(f"✅ Coletados {len(df)} registros para {symbol}")
             return df
 
+        except FetchCancelled:
+            raise
         except Exception as e:
             print(f"❌ Erro ao coletar dados via CCXT: {e}")
             return None
 
-    def get_historical_data_yfinance(self, symbol, period='1y'):
-        """Coleta dados via yfinance (para cryptos listadas)"""
+    @staticmethod
+    def _ohlcv_to_frame(ohlcv):
+        """Converte linhas OHLCV do CCXT para o DataFrame padronizado"""
+        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('date', inplace=True)
+        df.drop('timestamp', axis=1, inplace=True)
+
+        # Renomeia colunas para padronizar
+        df.rename(columns={'close': 'price'}, inplace=True)
+        df['market_cap'] = 0  # CCXT não fornece market cap diretamente
+        return df
+
+    @staticmethod
+    def _to_milliseconds(value):
+        """Converte datas (str, datetime, Timestamp) ou ms inteiros para ms UTC"""
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        timestamp = pd.Timestamp(value)
+        if timestamp.tz is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return int((timestamp - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+
+    def backfill_ohlcv(self, symbol, exchange='binance', timeframe='1h', since='2019-01-01',
+                       until=None, max_workers=MAX_CONCURRENT_REQUESTS, keep_checkpoint=True,
+                       allow_partial=False):
+        """
+        Backfill paginado de OHLCV via CCXT para históricos longos
+
+        Divide [since, until) em páginas do tamanho máximo aceito pela exchange e
+        as busca em paralelo. Cada página já fechada e com candles é gravada em
+        CACHE_DIR/backfill, de modo que uma execução interrompida retoma apenas
+        as páginas que faltam. Candles repetidos entre páginas são removidos.
+
+        Páginas que falham, ou que vêm vazias depois do primeiro candle (a
+        exchange pode ignorar `since` além do seu limite de histórico), não
+        viram checkpoint e tornam o resultado incompleto: levanta
+        BackfillIncomplete, ou, com allow_partial, retorna os candles obtidos
+        com as páginas faltantes em df.attrs['missing_pages'].
+        """
+        exchange_obj = self._get_exchange(exchange)
+        if exchange_obj is None:
+            print(f"❌ Exchange {exchange} não suportada")
+            return None
+
+        if not exchange_obj.has['fetchOHLCV']:
+            print(f"❌ Exchange {exchange} não suporta OHLCV")
+            return None
+
+        if not self.has_symbol(exchange, symbol):
+            print(f"❌ {symbol} não listado em {exchange}")
+            return None
+
+        timeframe_ms = exchange_obj.parse_timeframe(timeframe) * 1000
+        page_limit = CCXT_PAGE_LIMITS.get(exchange, CCXT_DEFAULT_PAGE_LIMIT)
+        page_ms = timeframe_ms * page_limit
+        now_ms = self._to_milliseconds(pd.Timestamp.now(tz='UTC'))
+        start_ms = self._to_milliseconds(since) // timeframe_ms * timeframe_ms
+        end_ms = min(self._to_milliseconds(until), now_ms) if until is not None else now_ms
+
+        checkpoint_dir = os.path.join(
+            CACHE_DIR, 'backfill', f"{exchange}_{symbol.replace('/', '-')}_{timeframe}"
+        )
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        def page_path(page_start):
+            return os.path.join(checkpoint_dir, f"page_{page_start}.json")
+
+        def fetch_page(page_start):
+            page_end = min(page_start + page_ms, end_ms)
+            path = page_path(page_start)
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return json.load(f)
+
+            ohlcv = self._fetch_ohlcv(exchange_obj, exchange, symbol, timeframe,
+                                      since=page_start, limit=page_limit) or []
+            rows = [row for row in ohlcv if page_start <= row[0] < page_end]
+            if ohlcv and not rows:
+                # Ex.: a Kraken devolve só os últimos 720 candles, qualquer que seja `since`
+                raise ValueError(f"{exchange} não retornou candles do período pedido")
+
+            # Só páginas completas e com candles viram checkpoint: uma página
+            # cortada por `until` (ou pelo presente) ou vazia é buscada de novo
+            if rows and page_end == page_start + page_ms:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(rows, f)
+                os.replace(tmp_path, path)
+
+            return rows
+
+        pages = list(range(start_ms, end_ms, page_ms))
+        resumed = sum(os.path.exists(page_path(page)) for page in pages)
+        print(f"📊 Backfill de {symbol} via {exchange} ({timeframe}): "
+              f"{len(pages)} páginas, {resumed} já salvas")
+
+        page_rows, failed = {}, []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch_page, page): page for page in pages}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=symbol):
+                try:
+                    page_rows[futures[future]] = future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"❌ Falha na página {futures[future]}: {e}")
+
+        # Páginas vazias antes do primeiro candle são o período anterior à listagem
+        first = min((page for page, rows in page_rows.items() if rows), default=None)
+        empty = [page for page, rows in page_rows.items() if not rows and first is not None and page > first]
+        missing = sorted(failed + empty)
+
+        if missing:
+            print(f"⚠️ {len(missing)} páginas sem dados ({len(failed)} falharam, {len(empty)} vazias). "
+                  f"Execute novamente para retomar.")
+        elif not keep_checkpoint:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+        rows = [row for page in pages for row in page_rows.get(page, [])]
+        df = None
+        if rows:
+            df = self._ohlcv_to_frame(rows)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+
+        if missing and not allow_partial:
+            raise BackfillIncomplete(symbol, missing, df)
+        if df is None:
+            print(f"❌ Nenhum dado encontrado para {symbol}")
+            return None
+
+        df.attrs['missing_pages'] = missing
+        print(f"{'⚠️ Backfill parcial' if missing else '✅ Backfill concluído'}: {len(df)} registros para {symbol}")
+        return df
+
+    def get_historical_data_yfinance(self, symbol, period='1y', days=None):
+        """Coleta dados via yfinance (para cryptos listadas); `days` substitui `period`"""
         try:
             print(f"📊 Tentando coletar {symbol} via yfinance...")
 
@@ -238,8 +712,33 @@ class UniversalCryptoCollector:
             if not symbol.endswith('-USD'):
                 symbol = f"{symbol}-USD"
 
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period)
+            cache_key = ('yfinance_history', symbol, period if days is None else days)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                print(f"⚡ Cache: {len(cached)} registros para {symbol}")
+                return cached
+
+            if self.offline:
+                return None
+
+            import yfinance as yf
+
+            self._check_cancelled()
+            breaker = get_breaker('yfinance')
+            breaker.check()
+            self.rate_limiter.acquire('yfinance')
+            self._check_cancelled()
+            try:
+                ticker = yf.Ticker(symbol)
+                if days is None:
+                    data = ticker.history(period=period)
+                else:
+                    start = pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=days)
+                    data = ticker.history(start=start.strftime('%Y-%m-%d'))
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
 
             if data.empty:
                 print(f"❌ Nenhum dado encontrado para {symbol}")
@@ -251,66 +750,290 @@ class UniversalCryptoCollector:
             df['volume'] = data['Volume']
             df['market_cap'] = 0  # yfinance não tem market cap direto
 
+            self.cache.set(cache_key, df)
             print(f"✅ Coletados {len(df)} registros para {symbol}")
             return df
 
+        except FetchCancelled:
+            raise
         except Exception as e:
             print(f"❌ Erro ao coletar dados via yfinance: {e}")
             return None
 
-    def collect_crypto_data(self, crypto_id, days=365, methods=['coingecko', 'ccxt', 'yfinance']):
-        """Coleta dados usando múltiplos métodos como fallback"""
-        print(f"\n🎯 Iniciando coleta para {crypto_id}")
+    def _source_candidates(self, crypto_id, methods):
+        """Lista as fontes possíveis para uma moeda, na ordem de preferência"""
+        crypto_info = POPULAR_CRYPTOS.get(crypto_id, {})
+        symbol = crypto_info.get('symbol', crypto_id.upper())
 
-        # Tenta CoinGecko primeiro (mais confiável)
+        candidates = []
         if 'coingecko' in methods:
-            data = self.get_historical_data_coingecko(crypto_id, days)
-            if data is not None and not data.empty:
-                return data
-
-        # Fallback para CCXT
+            candidates.append({'method': 'coingecko'})
         if 'ccxt' in methods:
-            # Tenta diferentes símbolos e exchanges
-            crypto_info = POPULAR_CRYPTOS.get(crypto_id, {})
-            symbol = crypto_info.get('symbol', crypto_id.upper())
-
-            for exchange in ['binance', 'coinbase', 'kraken']:
-                for symbol_format in [f"{symbol}/USDT", f"{symbol}/USD", f"{symbol}/BTC"]:
-                    try:
-                        data = self.get_historical_data_ccxt(symbol_format, exchange, limit=days)
-                        if data is not None and not data.empty:
-                            return data
-                    except:
-                        continue
-
-        # Fallback para yfinance
+            for exchange in CCXT_EXCHANGES:
+                for quote in CCXT_QUOTE_CURRENCIES:
+                    if quote != symbol:
+                        candidates.append({'method': 'ccxt', 'exchange': exchange, 'symbol': f"{symbol}/{quote}"})
         if 'yfinance' in methods:
-            crypto_info = POPULAR_CRYPTOS.get(crypto_id, {})
-            symbol = crypto_info.get('symbol', crypto_id.upper())
+            candidates.append({'method': 'yfinance', 'symbol': symbol})
+        return candidates
+
+    def _fetch_from_source(self, crypto_id, source, days, interval=None, cancelled=None):
+        """
+        Coleta dados de uma fonte específica; retorna None se não houver dados
+
+        `cancelled` é uma função sem argumentos consultada antes de cada chamada
+        de rede (e do token do rate limiter): quando ela retorna True, a coleta
+        para sem ir à rede e o resultado é None.
+        """
+        if cancelled is not None and cancelled():
+            return None
+        self._local.cancelled = cancelled
+        try:
+            if source['method'] == 'coingecko':
+                data = self.get_historical_data_coingecko(crypto_id, days, interval)
+            elif source['method'] == 'ccxt':
+                data = self.get_historical_data_ccxt(source['symbol'], source['exchange'], limit=days)
+            else:
+                data = self.get_historical_data_yfinance(source['symbol'], days=days)
+        except FetchCancelled:
+            return None
+        except Exception as e:
+            print(f"❌ Erro na fonte {source}: {e}")
+            return None
+        finally:
+            self._local.cancelled = None
 
-            data = self.get_historical_data_yfinance(symbol)
-            if data is not None and not data.empty:
-                return data
+        if cancelled is not None and cancelled():
+            return None
 
-        print(f"❌ Não foi possível coletar dados para {crypto_id}")
-        return None
+        if data is None or data.empty:
+            return None
+        return data
+
+    def _race_sources(self, crypto_id, candidates, days, interval=None):
+        """
+        Consulta as fontes em paralelo e retorna (dados, fonte) da mais bem
+        colocada na ordem de `candidates` que tiver dados
+
+        A primeira fonte (CoinGecko, quando presente) recebe uma vantagem de
+        SOURCE_HEDGE_DELAY_SECONDS; se não responder a tempo, as demais são
+        disparadas, no máximo SOURCE_RACE_MAX_WORKERS de cada vez. Uma
+        resposta só vence quando todas as fontes à frente dela já falharam,
+        então uma fonte preferida mais lenta ganha de uma alternativa rápida.
+        Fontes abaixo de uma que já trouxe dados, e todas as demais depois que
+        o vencedor é definido, param antes da próxima chamada de rede (sem
+        consumir tokens do rate limiter).
+        """
+        if not candidates:
+            return None, None
+
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=max(1, SOURCE_RACE_MAX_WORKERS))
+        futures = {}
+        results = {}
+        best = [len(candidates)]
+        best_lock = threading.Lock()
+
+        def fetch(rank):
+            # Fontes abaixo de uma que já tem dados não precisam rodar
+            if best[0] < rank:
+                return None
+            data = self._fetch_from_source(crypto_id, candidates[rank], days, interval,
+                                           lambda: cancelled.is_set() or best[0] < rank)
+            if data is not None:
+                with best_lock:
+                    best[0] = min(best[0], rank)
+            return data
+
+        def submit(rank):
+            futures[executor.submit(fetch, rank)] = rank
+
+        def winner():
+            # Primeira posição ainda pendente ou com dados decide o resultado
+            for rank in range(len(candidates)):
+                if rank not in results:
+                    return None
+                if results[rank] is not None:
+                    return rank
+            return -1
 
-    def save_data(self, data, filename):
-        """Salva dados em CSV"""
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
+        try:
+            submit(0)
+            done, _ = wait(futures, timeout=SOURCE_HEDGE_DELAY_SECONDS)
+            for future in done:
+                results[0] = future.result()
+            if winner() is None:
+                for rank in range(1, len(candidates)):
+                    submit(rank)
+
+            pending = set(futures)
+            while winner() is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+
+            rank = winner()
+            if rank is None or rank < 0:
+                return None, None
+            return results[rank], candidates[rank]
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def collect_crypto_data(self, crypto_id, days=365, methods=['coingecko', 'ccxt', 'yfinance'], interval=None):
+        """
+        Coleta dados usando múltiplos métodos como fallback
+
+        As fontes candidatas são consultadas em paralelo e vence a mais bem
+        colocada na ordem de preferência; a exchange e o símbolo do CCXT que
+        funcionaram são memorizados para as próximas execuções. Pedidos concorrentes idênticos
+        (mesma moeda, dias, fontes e intervalo) compartilham uma única coleta.
+        """
+        key = ('history', crypto_id, days, tuple(methods), interval, self.offline)
+        return inflight.do(key, self._collect_crypto_data, crypto_id, days, methods, interval)
+
+    def _collect_crypto_data(self, crypto_id, days, methods, interval):
+        print(f"\n🎯 Iniciando coleta para {crypto_id}")
 
-        filepath = os.path.join(DATA_DIR, filename)
-        data.to_csv(filepath)
-        print(f"💾 Dados salvos em: {filepath}")
+        if self.offline:
+            return self._load_offline(crypto_id, days)
+
+        candidates = self._source_candidates(crypto_id, methods)
+
+        # Só a resolução do CCXT (exchange e formato do símbolo) é memorizada:
+        # ela passa à frente das outras combinações do CCXT, sem tirar a
+        # prioridade do CoinGecko
+        learned = self.source_cache.get(crypto_id)
+        if learned and learned.get('method') == 'ccxt' and learned in candidates:
+            print(f"⚡ Fonte memorizada para {crypto_id}: {learned}")
+            candidates.remove(learned)
+            first_ccxt = next((position for position, source in enumerate(candidates)
+                               if source['method'] == 'ccxt'), len(candidates))
+            candidates.insert(first_ccxt, learned)
+
+        data, source = self._race_sources(crypto_id, candidates, days, interval)
+        if data is not None:
+            self.last_sources[crypto_id] = source
+            if source['method'] == 'ccxt':
+                self.source_cache.set(crypto_id, source)
+            return data
 
-    def load_data(self, filename):
-        """Carrega dados de CSV"""
-        filepath = os.path.join(DATA_DIR, filename)
-        if os.path.exists(filepath):
-            return pd.read_csv(filepath, index_col=0, parse_dates=True)
+        print(f"❌ Não foi possível coletar dados para {crypto_id}")
         return None
 
+    def _load_offline(self, crypto_id, days):
+        """Dados sem rede: cache do CoinGecko (mesmo expirado) ou CSV salvo em DATA_DIR"""
+        interval = 'daily' if days > 90 else 'hourly'
+        data = self._cache_get(('coingecko_history', crypto_id, days, interval))
+        if data is None:
+            filename = f"{crypto_id}_historical.csv"
+            last_timestamp = get_last_timestamp(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND)
+            if last_timestamp is not None:
+                data = self.load_data(filename, start=last_timestamp - pd.Timedelta(days=days))
+
+        if data is None or data.empty:
+            print(f"📴 Modo offline: sem dados locais para {crypto_id}")
+            return None
+
+        print(f"📴 Modo offline: {len(data)} registros locais para {crypto_id}")
+        return data
+
+    async def collect_many(self, crypto_ids, days=365, methods=None, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        """
+        Coleta várias criptomoedas simultaneamente (gerador assíncrono)
+
+        Produz tuplas (crypto_id, data, error) na ordem em que as coletas terminam.
+        Todas as coletas dividem os rate limits por host do processo, e a falha de uma
+        moeda é reportada em `error` sem interromper o restante do lote.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        collect_args = (days,) if methods is None else (days, methods)
+
+        async def fetch(crypto_id):
+            try:
+                data = await loop.run_in_executor(
+                    executor, self.collect_crypto_data, crypto_id, *collect_args
+                )
+            except Exception as e:
+                return crypto_id, None, str(e)
+
+            if data is None or data.empty:
+                return crypto_id, None, "Nenhum dado coletado"
+            return crypto_id, data, None
+
+        tasks = [asyncio.ensure_future(fetch(crypto_id)) for crypto_id in crypto_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False)
+            self.report_cache_stats()
+
+    def collect_many_sync(self, crypto_ids, days=365, methods=None):
+        """Versão síncrona de collect_many: retorna (dados, erros) indexados por crypto_id"""
+        async def run():
+            results, errors = {}, {}
+            async for crypto_id, data, error in self.collect_many(crypto_ids, days, methods):
+                if error is None:
+                    results[crypto_id] = data
+                else:
+                    errors[crypto_id] = error
+            return results, errors
+
+        return asyncio.run(run())
+
+    def update_crypto_data(self, crypto_id, filename=None, days=365):
+        """
+        Coleta incremental: busca a partir da última barra armazenada (inclusive),
+        para que ela seja corrigida caso ainda estivesse aberta, e grava as
+        sobreposições deduplicadas; barras ainda abertas não são persistidas
+        """
+        filename = filename or f"{crypto_id}_historical.csv"
+        last_timestamp = get_last_timestamp(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND)
+
+        if last_timestamp is None:
+            data = closed_bars(self.collect_crypto_data(crypto_id, days))
+            if data is not None and not data.empty:
+                self.save_data(data, filename, source=self.last_sources.get(crypto_id))
+            return data
+
+        # Dias desde o último registro, com um dia extra para incluí-lo
+        elapsed = pd.Timestamp.now(tz='UTC').tz_localize(None) - last_timestamp
+        delta_days = max(1, int(np.ceil(elapsed / pd.Timedelta(days=1)))) + 1
+        print(f"🔄 Atualização incremental de {crypto_id}: {delta_days} dia(s) desde {last_timestamp}")
+
+        data = closed_bars(self.collect_crypto_data(crypto_id, delta_days, interval='daily'),
+                           pd.Timedelta(days=1))
+        if data is None or data.empty:
+            return self.load_data(filename)
+
+        index = data.index.tz_convert('UTC').tz_localize(None) if data.index.tz is not None else data.index
+        added = append_data(data[index >= last_timestamp], filename, data_dir=DATA_DIR,
+                            backend=STORAGE_BACKEND, source=self.last_sources.get(crypto_id),
+                            compact=COMPACT_DTYPES)
+        print(f"✅ {added} novos registros para {crypto_id}")
+        self.report_cache_stats()
+
+        return self.load_data(filename)
+
+    def save_data(self, data, filename, source=None):
+        """
+        Salva dados no backend de armazenamento (STORAGE_BACKEND), atualizando o
+        catálogo; conteúdo idêntico ao salvo não é regravado
+        """
+        return save_data(data, filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND,
+                         source=source, compact=COMPACT_DTYPES)
+
+    def load_data(self, filename, start=None, end=None):
+        """Carrega dados salvos; start/end limitam o período lido"""
+        return load_data(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND,
+                         start=start, end=end, compact=COMPACT_DTYPES)
+
 def main():
     """Função principal para teste"""
     collector = UniversalCryptoCollector()
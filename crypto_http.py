@@ -0,0 +1,91 @@
+"""
+🔥 CriptoCaptorSmart - Transporte HTTP Compartilhado 🔥
+Sessão única do requests para todos os coletores: pool de conexões keep-alive
+por host, nova tentativa em falhas de conexão, gzip e timeouts padrão
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from crypto_config import (
+    CONNECTION_TIMEOUT, REQUEST_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+    HTTP_RETRY_CONNECT, HTTP_RETRY_BACKOFF, HTTP_USER_AGENT
+)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica (conexão, leitura) como timeout quando a chamada não informa um"""
+
+    def __init__(self, timeout=(CONNECTION_TIMEOUT, REQUEST_TIMEOUT), **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                   retries=HTTP_RETRY_CONNECT):
+    """
+    Cria uma sessão com pool de conexões
+
+    O transporte só repete GET/HEAD que falharam ao conectar (a requisição
+    nem chegou ao servidor). Timeouts de leitura e respostas 5xx/429 voltam
+    na primeira tentativa, para que cada tentativa passe pelo rate limiter
+    e conte no circuit breaker do host.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    adapter = PooledHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': HTTP_USER_AGENT,
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate'
+    })
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session():
+    """Sessão compartilhada do processo (criada no primeiro uso)"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+def create_pooled_session(session=None):
+    """
+    Sessão com cookies e cabeçalhos próprios sobre os adapters (e o pool de
+    conexões) de `session`, por padrão a compartilhada; para clientes que
+    alteram o estado da sessão a cada chamada, como o CCXT
+    """
+    session = session or get_shared_session()
+    pooled = requests.Session()
+    pooled.headers.update(session.headers)
+    for prefix, adapter in session.adapters.items():
+        pooled.mount(prefix, adapter)
+    return pooled
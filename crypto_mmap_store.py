@@ -0,0 +1,219 @@
+"""
+🔥 CriptoCaptorSmart - Store Memory-Mapped de Preços 🔥
+Séries históricas em arquivos binários de largura fixa, abertos com np.memmap:
+leitores recebem views NumPy sem cópia e vários processos compartilham a
+mesma cópia no page cache do sistema operacional
+"""
+
+import os
+import json
+import struct
+import threading
+import numpy as np
+import pandas as pd
+
+# Cabeçalho: magic, versão, linhas, checksum do catálogo, capacidade (linhas
+# reservadas), colunas e tamanho do cabeçalho; seguido dos nomes das colunas
+# em JSON. Os dados começam alinhados em HEADER_ALIGN bytes.
+MAGIC = b'CCMMAP'
+VERSION = 2
+HEADER_STRUCT = struct.Struct('<6sHQQQII')
+# Linhas e checksum são contíguos: um acréscimo atualiza os dois em uma escrita
+COUNTERS_OFFSET = 8
+COUNTERS_STRUCT = struct.Struct('<QQ')
+HEADER_ALIGN = 64
+MIN_SPARE_ROWS = 256
+
+_lock = threading.Lock()
+
+
+def _capacity(rows):
+    """Linhas reservadas para `rows` registros: folga para acréscimos sem regravar"""
+    return rows + max(MIN_SPARE_ROWS, rows // 4)
+
+
+def _utc_index(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns')
+
+
+class MmapSeries:
+    """
+    Série aberta em memória mapeada (somente leitura)
+
+    timestamps: int64 (ns desde a época, UTC) e columns: dict nome -> float64,
+    todos views sobre o mesmo arquivo. `checksum` é o do catálogo no momento
+    da gravação (0 se desconhecido).
+    """
+
+    def __init__(self, path, timestamps, columns, checksum=0):
+        self.path = path
+        self.timestamps = timestamps
+        self.columns = columns
+        self.checksum = checksum
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def dates(self):
+        """DatetimeIndex sobre os timestamps mapeados (sem cópia)"""
+        return pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'), copy=False, name='date')
+
+    def last_timestamp(self):
+        return pd.Timestamp(int(self.timestamps[-1])) if len(self) else None
+
+    def window(self, start=None, end=None):
+        """Posições [início, fim) de um período, por busca binária nos timestamps"""
+        first = 0 if start is None else int(np.searchsorted(self.timestamps, pd.Timestamp(start).value, 'left'))
+        last = len(self) if end is None else int(np.searchsorted(self.timestamps, pd.Timestamp(end).value, 'right'))
+        return first, last
+
+    def to_frame(self, start=None, end=None):
+        """DataFrame cujas colunas são views do arquivo mapeado"""
+        first, last = self.window(start, end)
+        return pd.DataFrame(
+            {name: values[first:last] for name, values in self.columns.items()},
+            index=self.dates[first:last],
+            copy=False
+        )
+
+
+class MmapPriceStore:
+    """
+    Um arquivo por série: DATA_DIR/mmap/<nome>.bin
+
+    Cada coluna ocupa `capacidade` linhas, das quais as primeiras `linhas`
+    são válidas; registros posteriores ao último são acrescentados na folga,
+    no próprio arquivo, e só então o contador do cabeçalho é atualizado.
+    """
+
+    def __init__(self, data_dir):
+        self.root = os.path.join(data_dir, 'mmap')
+
+    def path(self, filename):
+        return os.path.join(self.root, f"{os.path.splitext(os.path.basename(filename))[0]}.bin")
+
+    def exists(self, filename):
+        return os.path.exists(self.path(filename))
+
+    def _read_header(self, path):
+        """(linhas, checksum, capacidade, nomes, tamanho do cabeçalho) ou None"""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, rows, checksum, capacity, ncols, header_size = \
+                    HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))
+                if magic != MAGIC or version != VERSION:
+                    return None
+                names = json.loads(f.read(header_size - HEADER_STRUCT.size).rstrip(b'\0'))
+        except (OSError, struct.error, ValueError):
+            return None
+        return rows, checksum, capacity, names, header_size
+
+    def _write_file(self, path, names, timestamps, columns, capacity, checksum):
+        """Grava um arquivo completo (temporário + os.replace)"""
+        rows = len(timestamps)
+        names_blob = json.dumps(names).encode('utf-8')
+        header_size = HEADER_STRUCT.size + len(names_blob)
+        header_size += -header_size % HEADER_ALIGN
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            header = HEADER_STRUCT.pack(MAGIC, VERSION, rows, checksum, capacity, len(names), header_size)
+            f.write((header + names_blob).ljust(header_size, b'\0'))
+            spare = np.zeros(capacity - rows, dtype='float64')
+            for values in [np.asarray(timestamps, dtype='int64').view('float64')] + list(columns):
+                np.asarray(values, dtype='float64').tofile(f)
+                spare.tofile(f)
+        os.replace(tmp_path, path)
+        return path
+
+    def write(self, data, filename, checksum=0):
+        """
+        Grava a série (índice de datas + colunas numéricas) de forma atômica
+
+        O arquivo novo substitui o antigo via os.replace, então leitores que já
+        mapearam a versão anterior continuam vendo dados consistentes.
+        """
+        index = _utc_index(data.index)
+        order = np.argsort(index.asi8, kind='stable')
+        numeric = data.select_dtypes(include='number')
+        names = [str(name) for name in numeric.columns]
+        values = numeric.to_numpy(dtype='float64', na_value=np.nan)[order].T
+
+        with _lock:
+            return self._write_file(self.path(filename), names, index.asi8[order], values,
+                                    _capacity(len(index)), checksum)
+
+    def append(self, data, filename, checksum=0):
+        """
+        Acrescenta registros posteriores ao último do espelho, sem regravá-lo
+
+        Os valores vão para a folga do arquivo e depois o cabeçalho passa a
+        contar as linhas novas (leitores abertos antes continuam com a
+        contagem antiga). Sem folga suficiente, o arquivo é copiado uma vez
+        com capacidade maior. Retorna False se o espelho não existe, tem
+        outras colunas ou se os registros não são todos posteriores, casos
+        em que é preciso write() com a série completa.
+        """
+        path = self.path(filename)
+        index = _utc_index(data.index)
+        numeric = data.select_dtypes(include='number')
+
+        with _lock:
+            header = self._read_header(path)
+            if header is None or len(index) == 0:
+                return False
+            rows, _, capacity, names, header_size = header
+            if sorted(names) != sorted(str(name) for name in numeric.columns):
+                return False
+
+            order = np.argsort(index.asi8, kind='stable')
+            timestamps = index.asi8[order]
+            numeric = numeric.set_axis([str(name) for name in numeric.columns], axis=1)
+            values = numeric[names].to_numpy(dtype='float64', na_value=np.nan)[order].T
+
+            block = np.memmap(path, dtype='float64', mode='r+' if rows + len(timestamps) <= capacity else 'r',
+                              offset=header_size, shape=(len(names) + 1, capacity))
+            if rows and timestamps[0] <= block[0, rows - 1:rows].view('int64')[0]:
+                return False
+
+            total = rows + len(timestamps)
+            if total > capacity:
+                timestamps = np.concatenate([block[0, :rows].view('int64'), timestamps])
+                columns = [np.concatenate([block[position + 1, :rows], values[position]])
+                           for position in range(len(names))]
+                del block
+                self._write_file(path, names, timestamps, columns, _capacity(total), checksum)
+                return True
+
+            block[0, rows:total].view('int64')[:] = timestamps
+            if names:
+                block[1:, rows:total] = values
+            block.flush()
+            del block
+
+            with open(path, 'r+b') as f:
+                f.seek(COUNTERS_OFFSET)
+                f.write(COUNTERS_STRUCT.pack(total, checksum))
+                f.flush()
+        return True
+
+    def open(self, filename):
+        """Abre a série como views memory-mapped (None se não existir ou for inválida)"""
+        path = self.path(filename)
+        header = self._read_header(path)
+        if header is None:
+            return None
+        rows, checksum, capacity, names, header_size = header
+
+        if rows == 0:
+            empty = np.empty((len(names) + 1, 0), dtype='float64')
+            return MmapSeries(path, empty[0].view('int64'), dict(zip(names, empty[1:])), checksum)
+
+        block = np.memmap(path, dtype='float64', mode='r', offset=header_size, shape=(len(names) + 1, capacity))
+        return MmapSeries(path, block[0, :rows].view('int64'),
+                          {name: block[position + 1, :rows] for position, name in enumerate(names)}, checksum)
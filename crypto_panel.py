@@ -0,0 +1,179 @@
+"""
+🔥 CriptoCaptorSmart - Painel Multi-Ativo 🔥
+Universo de moedas alinhado em uma única grade datas x moedas: uma coluna
+float64 por moeda e campo (preço, volume, market cap) e uma máscara de
+validade, construído uma vez e fatiado por qualquer subconjunto de moedas
+sem copiar as colunas
+"""
+
+import numpy as np
+import pandas as pd
+from crypto_config import DATA_DIR, STORAGE_BACKEND
+from crypto_catalog import DataCatalog
+from crypto_storage import normalize_index
+from utils import load_data_mapped
+
+PANEL_FIELDS = ('price', 'volume', 'market_cap')
+
+
+class MarketPanel:
+    """
+    Painel alinhado: dates (DatetimeIndex, T), coins (N nomes),
+    columns: dict campo -> lista de N arrays (T,), uma por moeda,
+    e valid: array booleano (T, N)
+
+    valid[t, j] indica que a moeda j tem um registro completo (sem NaN em
+    nenhuma coluna, como dropna) na data t. Campos ausentes são NaN.
+    As colunas de uma moeda cujas datas já coincidem com as do painel são
+    as próprias arrays do DataFrame de origem (views do espelho
+    memory-mapped, com load_data_mapped); só as demais são copiadas para a
+    grade comum. field() monta o array (T, N) quando ele é necessário.
+    """
+
+    def __init__(self, dates, coins, columns, valid):
+        self.dates = dates
+        self.coins = list(coins)
+        self.columns = columns
+        self.valid = valid
+        self._positions = {coin: position for position, coin in enumerate(self.coins)}
+
+    @staticmethod
+    def _prepare(data):
+        """Índice de datas UTC ordenado e sem duplicados; copia apenas se preciso"""
+        index = data.index
+        if not (isinstance(index, pd.DatetimeIndex) and index.tz is None and index.unit == 'ns'):
+            data = normalize_index(data)
+        if not data.index.is_monotonic_increasing or data.index.has_duplicates:
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+        return data
+
+    @classmethod
+    def from_frames(cls, frames, fields=PANEL_FIELDS):
+        """Constrói o painel a partir de {moeda: DataFrame indexado por data}"""
+        prepared = {coin: cls._prepare(data) for coin, data in frames.items()}
+
+        indexes = [data.index for data in prepared.values()]
+        if indexes and all(index.equals(indexes[0]) for index in indexes[1:]):
+            timestamps = indexes[0].asi8
+            dates = indexes[0].rename('date')
+        else:
+            stamps = [index.asi8 for index in indexes]
+            timestamps = np.unique(np.concatenate(stamps)) if stamps else np.empty(0, dtype='int64')
+            dates = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name='date')
+
+        columns = {field: [] for field in fields}
+        valid = np.zeros((len(dates), len(prepared)), dtype=bool)
+
+        for position, data in enumerate(prepared.values()):
+            aligned = data.index.equals(dates)
+            rows = slice(None) if aligned else np.searchsorted(timestamps, data.index.asi8)
+            for field in fields:
+                values = None
+                if field in data.columns:
+                    values = data[field].to_numpy(dtype='float64', na_value=np.nan)
+                if values is None or not aligned:
+                    column = np.full(len(dates), np.nan)
+                    if values is not None:
+                        column[rows] = values
+                    values = column
+                columns[field].append(values)
+            valid[rows, position] = data.notna().all(axis=1).to_numpy()
+
+        return cls(dates, prepared.keys(), columns, valid)
+
+    @classmethod
+    def load(cls, coins, data_dir=DATA_DIR, backend=STORAGE_BACKEND, start=None, end=None,
+             fields=PANEL_FIELDS):
+        """
+        Carrega f"{moeda}_historical.csv" de cada moeda (espelho memory-mapped
+        quando disponível); moedas sem dados ficam de fora do painel
+        """
+        frames = {}
+        for coin in coins:
+            data = load_data_mapped(f"{coin}_historical.csv", data_dir, backend, start, end)
+            if data is not None and not data.empty:
+                frames[coin] = data
+        return cls.from_frames(frames, fields)
+
+    @staticmethod
+    def overlap(coins, data_dir=DATA_DIR):
+        """Período comum às moedas segundo o catálogo, (início, fim) ou (None, None)"""
+        return DataCatalog(data_dir).overlap([f"{coin}_historical.csv" for coin in coins]) or (None, None)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def shape(self):
+        return self.valid.shape
+
+    def field(self, name):
+        """Array (T, N) de um campo (cópia das colunas das moedas)"""
+        values = self.columns[name]
+        return np.column_stack(values) if values else np.empty((len(self), 0))
+
+    def _take(self, rows=slice(None), columns=slice(None)):
+        """Subpainel; linhas em slice e seleção de moedas mantêm as colunas como views"""
+        coins = np.asarray(self.coins, dtype=object)[columns].tolist()
+        positions = np.arange(len(self.coins))[columns]
+        return MarketPanel(
+            self.dates[rows], coins,
+            {name: [values[position][rows] for position in positions] for name, values in self.columns.items()},
+            self.valid[rows][:, columns]
+        )
+
+    def select(self, coins):
+        """Subpainel com as moedas pedidas, na ordem dada (mesmas datas)"""
+        missing = [coin for coin in coins if coin not in self._positions]
+        if missing:
+            raise KeyError(f"Moedas fora do painel: {', '.join(map(str, missing))}")
+        return self._take(columns=[self._positions[coin] for coin in coins])
+
+    def window(self, start=None, end=None):
+        """Subpainel do período [start, end], por busca binária nas datas"""
+        timestamps = self.dates.asi8
+        first = 0 if start is None else int(np.searchsorted(timestamps, pd.Timestamp(start).value, 'left'))
+        last = len(self) if end is None else int(np.searchsorted(timestamps, pd.Timestamp(end).value, 'right'))
+        return self._take(rows=slice(first, last))
+
+    def common(self):
+        """
+        Apenas as datas em que todas as moedas do painel têm registro válido
+        Um período contíguo (o caso usual após overlap()) é fatiado sem cópia.
+        """
+        mask = self.valid.all(axis=1)
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0 or positions[-1] - positions[0] + 1 == len(positions):
+            rows = slice(positions[0], positions[-1] + 1) if len(positions) else slice(0, 0)
+            return self._take(rows=rows)
+        return self._take(rows=mask)
+
+    def returns(self, field='price'):
+        """
+        Retornos percentuais entre linhas consecutivas, (T, N)
+        A primeira linha e pares com algum registro inválido são NaN.
+        """
+        values = np.where(self.valid, self.field(field), np.nan)
+        result = np.full(values.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[1:] = values[1:] / values[:-1] - 1
+        return result
+
+    def frame(self, field='price'):
+        """DataFrame datas x moedas de um campo (colunas como views)"""
+        return pd.DataFrame(dict(zip(self.coins, self.columns[field])), index=self.dates, copy=False)
+
+    def coin_frame(self, coin):
+        """DataFrame de uma moeda, com uma coluna por campo (views, sem cópia)"""
+        position = self._positions[coin]
+        return pd.DataFrame({name: values[position] for name, values in self.columns.items()},
+                            index=self.dates, copy=False)
+
+    def to_frame(self, fields=None):
+        """DataFrame largo com colunas f"{campo}_{moeda}", agrupadas por moeda (views)"""
+        fields = list(fields or self.columns)
+        columns = {}
+        for position, coin in enumerate(self.coins):
+            for field in fields:
+                columns[f"{field}_{coin}"] = self.columns[field][position]
+        return pd.DataFrame(columns, index=self.dates, copy=False)
@@ -0,0 +1,134 @@
+"""
+🔥 CriptoCaptorSmart - Rate Limiter 🔥
+Token bucket por host, compartilhado entre threads e tarefas asyncio,
+com backoff exponencial (com jitter) para respostas HTTP 429
+"""
+
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from crypto_config import (
+    API_RATE_LIMIT_CALLS, API_HOST_RATE_LIMITS, API_RATE_LIMIT_BURST_SECONDS,
+    API_BACKOFF_BASE_SECONDS, API_BACKOFF_MAX_SECONDS
+)
+
+
+def parse_retry_after(value):
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe
+
+    Cada chamada reserva um token imediatamente (o saldo pode ficar negativo)
+    e recebe o tempo de espera correspondente. A espera acontece fora do lock,
+    então threads e tarefas asyncio formam fila sem bloquear umas às outras.
+    """
+
+    def __init__(self, calls_per_minute, burst_seconds=API_RATE_LIMIT_BURST_SECONDS):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Reserva um token e retorna quantos segundos esperar antes de usá-lo"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(0.0, now - self.updated_at)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = max(now, self.updated_at)
+
+            self.tokens -= 1
+            deficit = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            # A reposição só recomeça ao fim do bloqueio: quem entra na fila
+            # durante ele sai espaçado de 1/rate a partir desse instante
+            return max(0.0, self.blocked_until - now) + deficit
+
+    def acquire(self):
+        """Bloqueia a thread atual até haver um token disponível"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Equivalente assíncrono de acquire (não bloqueia o event loop)"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """
+        Registra um HTTP 429 e suspende o bucket
+        Usa o Retry-After quando informado; caso contrário, backoff exponencial.
+        Retorna o atraso aplicado em segundos.
+        """
+        with self._lock:
+            self.failures += 1
+            if retry_after is not None:
+                delay = retry_after + random.uniform(0, API_BACKOFF_BASE_SECONDS)
+            else:
+                backoff = min(API_BACKOFF_MAX_SECONDS, API_BACKOFF_BASE_SECONDS * 2 ** (self.failures - 1))
+                delay = random.uniform(backoff / 2, backoff)
+
+            # Sem reposição durante o bloqueio; ao fim dele, apenas uma sonda
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.updated_at = max(self.updated_at, self.blocked_until)
+            self.tokens = min(self.tokens, 1.0)
+            return delay
+
+    def record_success(self):
+        """Zera o contador de falhas após uma resposta bem-sucedida"""
+        with self._lock:
+            self.failures = 0
+
+
+class HostRateLimiter:
+    """Registro de token buckets, um por host/provedor"""
+
+    def __init__(self, limits=None, default_calls_per_minute=API_RATE_LIMIT_CALLS):
+        self.limits = dict(API_HOST_RATE_LIMITS if limits is None else limits)
+        self.default_calls_per_minute = default_calls_per_minute
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        """Retorna (criando se necessário) o bucket de um host"""
+        with self._lock:
+            if host not in self._buckets:
+                calls = self.limits.get(host, self.default_calls_per_minute)
+                self._buckets[host] = TokenBucket(calls)
+            return self._buckets[host]
+
+    def acquire(self, host):
+        self.bucket(host).acquire()
+
+    async def acquire_async(self, host):
+        await self.bucket(host).acquire_async()
+
+    def penalize(self, host, retry_after=None):
+        return self.bucket(host).penalize(retry_after)
+
+    def record_success(self, host):
+        self.bucket(host).record_success()
+
+
+# Instância compartilhada por todos os coletores do processo
+rate_limiter = HostRateLimiter()
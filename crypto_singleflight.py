@@ -0,0 +1,71 @@
+"""
+🔥 CriptoCaptorSmart - Single-Flight 🔥
+Agrupa chamadas concorrentes idênticas: enquanto uma busca está em andamento,
+chamadas com a mesma chave esperam por ela e recebem o mesmo resultado
+"""
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Grupo de chamadas em andamento, indexadas por chave"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Executa fn(*args, **kwargs), a menos que uma chamada com a mesma chave
+        já esteja em andamento; nesse caso espera por ela
+
+        Quem espera recebe uma cópia do resultado (DataFrames e dicts), para
+        que alterações de um chamador não afetem os outros. Exceções da
+        chamada original são propagadas para todos.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _copy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self):
+        """Número de chamadas em andamento"""
+        with self._lock:
+            return len(self._calls)
+
+
+def _copy(result):
+    return result.copy() if hasattr(result, 'copy') else result
+
+
+# Grupo do processo: coletores diferentes (dashboard, terminal, jobs) compartilham as buscas
+inflight = SingleFlight()
@@ -0,0 +1,221 @@
+"""
+🔥 CriptoCaptorSmart - Backend SQLite de Séries Temporais 🔥
+Todas as séries em um único arquivo SQLite (DATA_DIR/timeseries.sqlite),
+em uma tabela WITHOUT ROWID com chave (coin_id, ts), com consultas por
+período e por várias moedas devolvendo arrays NumPy
+"""
+
+import os
+import json
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from crypto_storage import CSVStore, normalize_index, dataset_name, merge_frames
+
+DB_FILENAME = 'timeseries.sqlite'
+
+
+def _quote(column):
+    """Identificador SQL entre aspas (nomes de coluna vêm dos DataFrames)"""
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+def _ns(timestamp):
+    return None if timestamp is None else pd.Timestamp(timestamp).value
+
+
+class SQLiteStore:
+    """
+    Backend 'sqlite' com a mesma interface de CSVStore/ParquetStore
+
+    A tabela `series` tem uma coluna REAL por campo já visto em qualquer série
+    (novas colunas são adicionadas com ALTER TABLE); `series_columns` guarda
+    as colunas de cada moeda, na ordem original. Timestamps são inteiros em
+    nanossegundos (UTC), então filtros de período usam a chave primária.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, DB_FILENAME)
+        self.csv = CSVStore(data_dir)
+
+    def _connect(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS series ('
+            'coin_id TEXT NOT NULL, ts INTEGER NOT NULL, '
+            'PRIMARY KEY (coin_id, ts)) WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS series_columns ('
+            'coin_id TEXT PRIMARY KEY, columns TEXT NOT NULL)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS series_metadata ('
+            'coin_id TEXT PRIMARY KEY, metadata TEXT NOT NULL)'
+        )
+        return connection
+
+    def _table_columns(self, connection):
+        return {row[1] for row in connection.execute('PRAGMA table_info(series)')}
+
+    def _series_columns(self, connection, coin_id):
+        row = connection.execute('SELECT columns FROM series_columns WHERE coin_id = ?', (coin_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _ensure_columns(self, connection, columns):
+        existing = self._table_columns(connection)
+        for column in columns:
+            if column not in existing:
+                connection.execute(f'ALTER TABLE series ADD COLUMN {_quote(column)} REAL')
+
+    def _insert(self, connection, coin_id, data, upsert=False):
+        """Inserção em lote (executemany) das linhas de `data`"""
+        columns = [str(column) for column in data.columns]
+        names = ', '.join(['coin_id', 'ts'] + [_quote(column) for column in columns])
+        placeholders = ', '.join(['?'] * (len(columns) + 2))
+        verb = 'INSERT OR REPLACE' if upsert else 'INSERT'
+
+        values = data.to_numpy(dtype='float64', na_value=np.nan)
+        values = np.where(np.isnan(values), None, values)
+        timestamps = data.index.asi8.tolist()
+        connection.executemany(
+            f'{verb} INTO series ({names}) VALUES ({placeholders})',
+            ((coin_id, ts, *row) for ts, row in zip(timestamps, values.tolist()))
+        )
+
+    def path(self, filename):
+        return f"{self.db_path}#{dataset_name(filename)}"
+
+    def exists(self, filename):
+        with closing(self._connect()) as connection:
+            if self._series_columns(connection, dataset_name(filename)) is not None:
+                return True
+        return self.csv.exists(filename)
+
+    def save(self, data, filename, metadata=None):
+        """Substitui a série inteira (e seus metadados) em uma transação"""
+        if not isinstance(data.index, pd.DatetimeIndex):
+            return self.csv.save(data, filename, metadata)
+
+        coin_id = dataset_name(filename)
+        data = normalize_index(data)
+        data = data[~data.index.duplicated(keep='last')]
+        columns = [str(column) for column in data.columns]
+
+        with closing(self._connect()) as connection, connection:
+            self._ensure_columns(connection, columns)
+            connection.execute('DELETE FROM series WHERE coin_id = ?', (coin_id,))
+            self._insert(connection, coin_id, data)
+            connection.execute('INSERT OR REPLACE INTO series_columns VALUES (?, ?)',
+                               (coin_id, json.dumps(columns)))
+            connection.execute('DELETE FROM series_metadata WHERE coin_id = ?', (coin_id,))
+            if metadata:
+                connection.execute('INSERT INTO series_metadata VALUES (?, ?)', (coin_id, json.dumps(metadata)))
+        return self.path(filename)
+
+    def read_metadata(self, filename):
+        """Metadados gravados com a série (ou None)"""
+        coin_id = dataset_name(filename)
+        with closing(self._connect()) as connection:
+            if self._series_columns(connection, coin_id) is None:
+                return self.csv.read_metadata(filename)
+            row = connection.execute('SELECT metadata FROM series_metadata WHERE coin_id = ?', (coin_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, filenames, start=None, end=None, columns=None):
+        """
+        Consulta uma ou várias moedas em um período, direto para NumPy
+
+        Retorna dict com 'coin' (array de nomes), 'ts' (int64, ns UTC) e um
+        array float64 por coluna pedida (padrão: as colunas da primeira
+        moeda), ordenados por moeda e data. Colunas que uma moeda não tem
+        vêm como NaN.
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        coin_ids = [dataset_name(filename) for filename in filenames]
+
+        with closing(self._connect()) as connection:
+            if columns is None:
+                columns = self._series_columns(connection, coin_ids[0]) or []
+            available = self._table_columns(connection)
+            selected = [_quote(column) if column in available else 'NULL' for column in columns]
+
+            sql = (f"SELECT coin_id, ts{''.join(', ' + column for column in selected)} FROM series "
+                   f"WHERE coin_id IN ({', '.join('?' * len(coin_ids))})")
+            params = list(coin_ids)
+            if start is not None:
+                sql += ' AND ts >= ?'
+                params.append(_ns(start))
+            if end is not None:
+                sql += ' AND ts <= ?'
+                params.append(_ns(end))
+            rows = connection.execute(sql + ' ORDER BY coin_id, ts', params).fetchall()
+
+        result = {
+            'coin': np.array([row[0] for row in rows], dtype=object),
+            'ts': np.fromiter((row[1] for row in rows), dtype='int64', count=len(rows))
+        }
+        values = np.array([row[2:] for row in rows], dtype='float64').reshape(len(rows), len(columns))
+        for position, column in enumerate(columns):
+            result[column] = values[:, position]
+        return result
+
+    def load(self, filename, start=None, end=None):
+        """Carrega a série (apenas o período [start, end], pela chave primária)"""
+        coin_id = dataset_name(filename)
+        with closing(self._connect()) as connection:
+            columns = self._series_columns(connection, coin_id)
+        if columns is None:
+            return self.csv.load(filename, start, end)
+
+        arrays = self.query(filename, start, end, columns)
+        data = pd.DataFrame({column: arrays[column] for column in columns},
+                            index=pd.to_datetime(arrays['ts'], unit='ns'))
+        data.index.name = 'date'
+        return data
+
+    def last_timestamp(self, filename):
+        """MAX(ts) da moeda, resolvido pelo índice da chave primária"""
+        coin_id = dataset_name(filename)
+        with closing(self._connect()) as connection:
+            if self._series_columns(connection, coin_id) is None:
+                return self.csv.last_timestamp(filename)
+            row = connection.execute('SELECT MAX(ts) FROM series WHERE coin_id = ?', (coin_id,)).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] is not None else None
+
+    def append(self, new_data, filename):
+        """Upsert em lote dos registros novos; retorna quantos não existiam"""
+        coin_id = dataset_name(filename)
+        with closing(self._connect()) as connection:
+            columns = self._series_columns(connection, coin_id)
+            if columns is not None:
+                # Mantém o esquema já armazenado
+                if set(columns) <= set(new_data.columns):
+                    new_data = new_data[columns]
+
+                timestamps = new_data.index.asi8
+                existing = connection.execute(
+                    'SELECT ts FROM series WHERE coin_id = ? AND ts BETWEEN ? AND ?',
+                    (coin_id, int(timestamps.min()), int(timestamps.max()))
+                ).fetchall()
+                added = len(np.setdiff1d(timestamps, np.array([row[0] for row in existing], dtype='int64')))
+
+                with connection:
+                    self._ensure_columns(connection, new_data.columns)
+                    self._insert(connection, coin_id, new_data, upsert=True)
+                    merged = columns + [str(column) for column in new_data.columns if str(column) not in columns]
+                    connection.execute('INSERT OR REPLACE INTO series_columns VALUES (?, ?)',
+                                       (coin_id, json.dumps(merged)))
+                return added
+
+        combined, added = merge_frames(self.csv.load(filename), new_data)
+        self.save(combined, filename, self.csv.read_metadata(filename))
+        return added
@@ -0,0 +1,473 @@
+"""
+🔥 CriptoCaptorSmart - Armazenamento de Séries Históricas 🔥
+Backends de armazenamento para os históricos salvos em DATA_DIR:
+CSV (formato original) e Parquet colunar particionado por moeda e ano
+"""
+
+import io
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+
+def normalize_index(data):
+    """Converte o índice para DatetimeIndex sem fuso horário (UTC), em nanossegundos"""
+    index = pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    index = index.as_unit('ns')
+    data = data.copy()
+    data.index = index
+    return data
+
+
+def _encode_column(values, price, spec):
+    """
+    Codificação compacta de uma coluna: None se ela não puder ser representada
+    Colunas zeradas e colunas proporcionais ao preço (market cap = preço x
+    supply) não são armazenadas; as demais viram float32 ou inteiros escalados.
+    """
+    values = np.asarray(values, dtype='float64')
+    if not np.isnan(values).any() and not values.any():
+        return {'constant': 0.0}, None
+
+    if price is not None:
+        price = np.asarray(price, dtype='float64')
+        valid = (price > 0) & np.isfinite(values)
+        if valid.all():
+            factor = float(np.median(values / price))
+            if factor > 0 and np.allclose(values, price * factor, rtol=1e-9, atol=0):
+                return {'derived': 'price', 'factor': factor}, None
+
+    dtype, decimals = (spec, None) if isinstance(spec, str) else spec
+    if dtype == 'float32':
+        return {'dtype': 'float32'}, values.astype('float32')
+
+    scaled = np.round(values * 10.0 ** decimals)
+    info = np.iinfo(dtype)
+    if np.isfinite(scaled).all() and scaled.min() >= info.min and scaled.max() <= info.max:
+        return {'dtype': dtype, 'decimals': decimals}, scaled.astype(dtype)
+    return {'dtype': 'float32'}, values.astype('float32')
+
+
+def compact_frame(data, column_specs):
+    """
+    Versão compacta de `data` para armazenamento: retorna (frame, encoding)
+
+    column_specs: dict coluna -> 'float32' ou (dtype inteiro, casas decimais),
+    ex.: {'volume': ('int32', -2)} guarda o volume em centenas. `encoding`
+    descreve como expand_frame reconstrói cada coluna codificada.
+    """
+    price = data['price'].to_numpy() if 'price' in data.columns else None
+    stored, encoding = {}, {}
+    for column in data.columns:
+        if column not in column_specs:
+            stored[column] = data[column].to_numpy()
+            continue
+        encoding[column], values = _encode_column(data[column].to_numpy(), price, column_specs[column])
+        if values is not None:
+            stored[column] = values
+    return pd.DataFrame(stored, index=data.index), encoding
+
+
+def encode_frame(data, encoding):
+    """
+    Aplica uma codificação já existente a registros novos (para acréscimos)
+    Retorna None se os registros não cabem nela (ex.: market cap deixou de
+    ser proporcional ao preço), caso em que a série deve ser recodificada.
+    """
+    price = data['price'].to_numpy(dtype='float64') if 'price' in data.columns else None
+    stored = {}
+    for column in data.columns:
+        values = data[column].to_numpy()
+        rule = encoding.get(column)
+        if rule is None:
+            stored[column] = values
+        elif 'constant' in rule:
+            if np.any(np.asarray(values, dtype='float64') != rule['constant']):
+                return None
+        elif 'derived' in rule:
+            if price is None or not np.allclose(values, price * rule['factor'], rtol=1e-9, atol=0):
+                return None
+        elif rule['dtype'] == 'float32':
+            stored[column] = np.asarray(values, dtype='float32')
+        else:
+            scaled = np.round(np.asarray(values, dtype='float64') * 10.0 ** rule['decimals'])
+            info = np.iinfo(rule['dtype'])
+            if not np.isfinite(scaled).all() or scaled.min() < info.min or scaled.max() > info.max:
+                return None
+            stored[column] = scaled.astype(rule['dtype'])
+    return pd.DataFrame(stored, index=data.index)
+
+
+def expand_frame(data, encoding, columns=None, dtype='float64'):
+    """
+    Reconstrói as colunas codificadas por compact_frame, como `dtype`
+    ('float32' mantém a representação compacta em memória)
+    """
+    if data is None:
+        return None
+    data = data.copy()
+    for column, rule in encoding.items():
+        if 'constant' in rule:
+            data[column] = np.full(len(data), rule['constant'], dtype=dtype)
+        elif 'derived' in rule:
+            data[column] = (data[rule['derived']].to_numpy(dtype='float64') * rule['factor']).astype(dtype)
+        elif 'decimals' in rule:
+            data[column] = (data[column].to_numpy(dtype='float64') / 10.0 ** rule['decimals']).astype(dtype)
+        else:
+            # Passa por float32 para que uma coluna relida do CSV como float64 volte ao mesmo valor
+            data[column] = data[column].to_numpy().astype('float32').astype(dtype)
+    if columns is not None:
+        data = data[[column for column in columns if column in data.columns]]
+    return data
+
+
+def dataset_name(filename):
+    """'btc_historical.csv' -> 'btc_historical' (o nome é independente do formato)"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+# Metadados gravados junto com os dados: {'columns': colunas originais,
+# 'encoding': regras de compact_frame}. No CSV ficam em uma primeira linha
+# de comentário; no Parquet, nos metadados do esquema de cada arquivo.
+CSV_METADATA_PREFIX = b'#metadata '
+PARQUET_METADATA_KEY = b'criptocaptor.metadata'
+
+
+def storage_metadata(columns, encoding):
+    """Metadados de uma série gravada de forma compacta (None se não houver codificação)"""
+    return {'columns': [str(column) for column in columns], 'encoding': encoding} if encoding else None
+
+
+def _slice(data, start=None, end=None):
+    """Filtra um DataFrame indexado por data para [start, end]"""
+    if data is None:
+        return None
+    if start is not None:
+        data = data[data.index >= pd.Timestamp(start)]
+    if end is not None:
+        data = data[data.index <= pd.Timestamp(end)]
+    return data
+
+
+def merge_frames(existing, new_data):
+    """
+    Combina registros novos com os existentes, mantendo o esquema armazenado
+    Retorna (combinado, número de registros novos)
+    """
+    if existing is None or existing.empty:
+        return new_data, len(new_data)
+
+    if set(existing.columns) <= set(new_data.columns):
+        new_data = new_data[list(existing.columns)]
+
+    added = len(new_data.index.difference(existing.index))
+    combined = pd.concat([existing, new_data])
+    combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+    return combined, added
+
+
+class CSVStore:
+    """Um arquivo CSV por série: DATA_DIR/<nome>.csv"""
+
+    name = 'csv'
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+
+    def path(self, filename):
+        return os.path.join(self.data_dir, f"{dataset_name(filename)}.csv")
+
+    def exists(self, filename):
+        return os.path.exists(self.path(filename))
+
+    def save(self, data, filename, metadata=None):
+        """
+        Grava em arquivo temporário e troca com os.replace (leitores nunca veem
+        meio arquivo); `metadata` vai na primeira linha, como comentário
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        filepath = self.path(filename)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            if metadata:
+                f.write(CSV_METADATA_PREFIX.decode() + json.dumps(metadata) + '\n')
+            data.to_csv(f, index=True, lineterminator='\n')
+        os.replace(tmp_path, filepath)
+        return filepath
+
+    def read_metadata(self, filename):
+        """Metadados gravados com a série (ou None)"""
+        filepath = self.path(filename)
+        try:
+            with open(filepath, 'rb') as f:
+                line = f.readline()
+        except OSError:
+            return None
+        if not line.startswith(CSV_METADATA_PREFIX) or not line.endswith(b'\n'):
+            return None
+        return json.loads(line[len(CSV_METADATA_PREFIX):])
+
+    def _header(self, filepath):
+        """Colunas do cabeçalho (após a linha de metadados, se houver)"""
+        with open(filepath, 'r') as f:
+            line = f.readline()
+            if line.startswith(CSV_METADATA_PREFIX.decode()):
+                line = f.readline()
+        return line.strip().split(',')[1:]
+
+    def _complete_lines(self, filepath, offset=0):
+        """
+        Conteúdo a partir de `offset` até a última quebra de linha: uma linha
+        final sem terminador (acréscimo em andamento ou interrompido) é ignorada
+        """
+        with open(filepath, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+        return raw[:raw.rfind(b'\n') + 1]
+
+    def load(self, filename, start=None, end=None):
+        """Lê o CSV inteiro; start/end são aplicados depois da leitura"""
+        filepath = self.path(filename)
+        if not os.path.exists(filepath):
+            return None
+        content = self._complete_lines(filepath)
+        if content.startswith(CSV_METADATA_PREFIX):
+            content = content[content.find(b'\n') + 1:]
+        if not content:
+            return None
+        # round_trip: o parser padrão não devolve exatamente os floats gravados
+        data = pd.read_csv(io.BytesIO(content), index_col=0, parse_dates=True, float_precision='round_trip')
+        return _slice(data, start, end)
+
+    def last_timestamp(self, filename):
+        """Último timestamp do arquivo, lendo apenas o final dele"""
+        filepath = self.path(filename)
+        if not os.path.exists(filepath):
+            return None
+
+        size = os.path.getsize(filepath)
+        tail = self._complete_lines(filepath, max(0, size - 4096)).decode('utf-8', errors='ignore')
+
+        lines = [line for line in tail.splitlines() if line.strip() and not line.startswith('#')]
+        if len(lines) < 2 and size <= 4096:
+            return None  # Apenas o cabeçalho
+
+        try:
+            return pd.Timestamp(lines[-1].split(',', 1)[0])
+        except (IndexError, ValueError):
+            return None
+
+    def _ends_with_newline(self, filepath):
+        with open(filepath, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def append(self, new_data, filename):
+        """
+        Registros posteriores ao último armazenado são acrescentados ao final do
+        arquivo, em uma única escrita de linhas completas (leitores ignoram uma
+        última linha ainda sem terminador); sobreposições, ou um final
+        interrompido por uma falha anterior, forçam uma regravação deduplicada
+        """
+        filepath = self.path(filename)
+        last_timestamp = self.last_timestamp(filename)
+
+        metadata = self.read_metadata(filename)
+        if last_timestamp is None:
+            self.save(new_data, filename, metadata)
+            return len(new_data)
+
+        columns = self._header(filepath)
+
+        # Mantém o esquema já armazenado
+        if set(columns) <= set(new_data.columns):
+            new_data = new_data[columns]
+
+        if (new_data.index.min() > last_timestamp and list(new_data.columns) == columns
+                and self._ends_with_newline(filepath)):
+            content = memoryview(new_data.to_csv(header=False, index=True, lineterminator='\n').encode('utf-8'))
+            descriptor = os.open(filepath, os.O_WRONLY | os.O_APPEND)
+            try:
+                while content:
+                    content = content[os.write(descriptor, content):]
+            finally:
+                os.close(descriptor)
+            return len(new_data)
+
+        combined, added = merge_frames(self.load(filename), new_data)
+        self.save(combined, filename, metadata)
+        return added
+
+
+class ParquetStore:
+    """
+    Parquet colunar particionado por moeda e ano (estilo Hive):
+    DATA_DIR/parquet/coin=<nome>/year=<ano>/part-0.parquet
+
+    Colunas mantêm seus tipos (datas como timestamp, floats sem perda de
+    precisão). Filtros de data descartam anos inteiros pelo diretório e
+    linhas pelas estatísticas de cada arquivo, então carregar um ano de uma
+    moeda lê apenas essa fatia. Séries que ainda só existem em CSV são lidas
+    do CSV até serem gravadas novamente.
+    """
+
+    name = 'parquet'
+
+    def __init__(self, data_dir):
+        import pyarrow  # noqa: F401 - falha cedo se pyarrow não estiver instalado
+        self.data_dir = data_dir
+        self.root = os.path.join(data_dir, 'parquet')
+        self.csv = CSVStore(data_dir)
+
+    def path(self, filename):
+        return os.path.join(self.root, f"coin={dataset_name(filename)}")
+
+    def _year_path(self, filename, year):
+        return os.path.join(self.path(filename), f"year={int(year)}", 'part-0.parquet')
+
+    def _years(self, filename):
+        """Anos gravados da série, em ordem"""
+        try:
+            entries = os.listdir(self.path(filename))
+        except OSError:
+            return []
+        return sorted(int(entry[5:]) for entry in entries
+                      if entry.startswith('year=') and entry[5:].isdigit())
+
+    def exists(self, filename):
+        return bool(self._years(filename)) or self.csv.exists(filename)
+
+    def _write_year(self, data, filename, year, metadata=None):
+        """Grava (de forma atômica) a partição de um ano"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        filepath = self._year_path(filename, year)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        frame = data.copy()
+        frame.index.name = 'date'
+        table = pa.Table.from_pandas(frame.reset_index(), preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}), PARQUET_METADATA_KEY: json.dumps(metadata).encode('utf-8')
+            })
+
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path, compression='snappy')
+        os.replace(tmp_path, filepath)
+
+    def _read_year(self, filename, year):
+        import pyarrow.parquet as pq
+
+        filepath = self._year_path(filename, year)
+        if not os.path.exists(filepath):
+            return None
+        return pq.read_table(filepath).to_pandas().set_index('date')
+
+    def save(self, data, filename, metadata=None):
+        """Regrava a série inteira (um arquivo por ano, cada um com os metadados)"""
+        if not isinstance(data.index, pd.DatetimeIndex):
+            # Sem eixo de datas não há como particionar por ano
+            return self.csv.save(data, filename, metadata)
+
+        data = normalize_index(data)
+        years = data.index.year
+        written = set()
+        for year in pd.unique(years):
+            self._write_year(data[years == year], filename, year, metadata)
+            written.add(int(year))
+
+        for year in set(self._years(filename)) - written:
+            shutil.rmtree(os.path.dirname(self._year_path(filename, year)), ignore_errors=True)
+        return self.path(filename)
+
+    def read_metadata(self, filename):
+        """Metadados gravados com a série, lidos do esquema do ano mais recente"""
+        years = self._years(filename)
+        if not years:
+            return self.csv.read_metadata(filename)
+
+        import pyarrow.parquet as pq
+
+        value = (pq.read_schema(self._year_path(filename, years[-1])).metadata or {}).get(PARQUET_METADATA_KEY)
+        return json.loads(value) if value else None
+
+    def load(self, filename, start=None, end=None):
+        """Carrega a série, lendo apenas os anos e linhas dentro de [start, end]"""
+        if not self._years(filename):
+            return self.csv.load(filename, start, end)
+
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path(filename), format='parquet', partitioning='hive')
+        predicate = None
+        for bound, op in ((start, '>='), (end, '<=')):
+            if bound is None:
+                continue
+            bound = pd.Timestamp(bound)
+            year_filter = ds.field('year') >= bound.year if op == '>=' else ds.field('year') <= bound.year
+            date_filter = ds.field('date') >= bound if op == '>=' else ds.field('date') <= bound
+            condition = year_filter & date_filter
+            predicate = condition if predicate is None else predicate & condition
+
+        columns = [name for name in dataset.schema.names if name != 'year']
+        table = dataset.to_table(columns=columns, filter=predicate)
+        return table.to_pandas().set_index('date').sort_index()
+
+    def last_timestamp(self, filename):
+        """Último timestamp, lendo apenas a coluna de datas do ano mais recente"""
+        years = self._years(filename)
+        if not years:
+            return self.csv.last_timestamp(filename)
+
+        import pyarrow.parquet as pq
+
+        dates = pq.read_table(self._year_path(filename, years[-1]), columns=['date']).column('date')
+        if len(dates) == 0:
+            return None
+        return pd.Timestamp(dates.to_pandas().max())
+
+    def append(self, new_data, filename):
+        """Regrava apenas as partições dos anos que recebem registros novos"""
+        metadata = self.read_metadata(filename)
+        if not self._years(filename):
+            combined, added = merge_frames(self.csv.load(filename), new_data)
+            self.save(combined, filename, metadata)
+            return added
+
+        added = 0
+        years = new_data.index.year
+        for year in pd.unique(years):
+            combined, year_added = merge_frames(self._read_year(filename, year), new_data[years == year])
+            self._write_year(combined, filename, year, metadata)
+            added += year_added
+        return added
+
+
+STORAGE_BACKENDS = {
+    'csv': CSVStore,
+    'parquet': ParquetStore
+}
+
+
+def get_store(backend, data_dir):
+    """Instancia o backend de armazenamento; sem pyarrow, Parquet recai para CSV"""
+    if backend == 'sqlite' and backend not in STORAGE_BACKENDS:
+        # Importado sob demanda (o módulo depende deste)
+        from crypto_sqlite_store import SQLiteStore
+        STORAGE_BACKENDS[backend] = SQLiteStore
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+    try:
+        return STORAGE_BACKENDS[backend](data_dir)
+    except ImportError:
+        print(f"⚠️ Backend '{backend}' indisponível (pyarrow não instalado); usando CSV")
+        return CSVStore(data_dir)
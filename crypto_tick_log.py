@@ -0,0 +1,346 @@
+"""
+🔥 CriptoCaptorSmart - Log de Ticks Append-Only 🔥
+Log segmentado para barras e ticks recebidos em tempo real: registros de
+tamanho fixo com CRC, fsync em lote, recuperação após falha e compactação em
+segundo plano para o armazenamento histórico principal
+"""
+
+import os
+import time
+import zlib
+import struct
+import threading
+import numpy as np
+import pandas as pd
+from crypto_config import (
+    DATA_DIR, STORAGE_BACKEND, TICK_SEGMENT_MAX_BYTES, TICK_FSYNC_BATCH,
+    TICK_FSYNC_INTERVAL_SECONDS, TICK_COMPACTION_INTERVAL_SECONDS
+)
+from utils import append_data
+
+# Registro: crc32 do restante | timestamp (ns, UTC) | price | volume | market_cap
+RECORD = struct.Struct('<Iqddd')
+PAYLOAD = struct.Struct('<qddd')
+RECORD_DTYPE = np.dtype([('crc', '<u4'), ('timestamp', '<i8'), ('price', '<f8'),
+                         ('volume', '<f8'), ('market_cap', '<f8')])
+SEGMENT_SUFFIX = '.log'
+
+
+def _to_nanoseconds(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp.value
+
+
+def pack_records(timestamps, price, volume, market_cap):
+    """
+    Registros de vários ticks em um único buffer (array RECORD_DTYPE)
+    Os campos são preenchidos de uma vez; só o CRC é calculado registro a registro.
+    """
+    records = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    records['price'] = price
+    records['volume'] = volume
+    records['market_cap'] = market_cap
+    view = memoryview(records.view(np.uint8))
+    records['crc'] = [zlib.crc32(view[offset + 4:offset + RECORD.size])
+                      for offset in range(0, len(view), RECORD.size)]
+    return records
+
+
+class _Writer:
+    """Segmento ativo de uma série"""
+
+    def __init__(self, path, sequence):
+        self.path = path
+        self.sequence = sequence
+        self.file = open(path, 'ab')
+        self.size = self.file.tell()
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        # Momento do primeiro registro ainda sem fsync (prazo do flusher)
+        self.first_pending = None
+
+
+class TickLog:
+    """
+    Log append-only por série em DATA_DIR/ticks/<nome>/<sequência>.log
+
+    Gravações vão para o segmento ativo e recebem fsync a cada
+    TICK_FSYNC_BATCH registros ou, no máximo, TICK_FSYNC_INTERVAL_SECONDS
+    segundos depois (uma thread daemon sincroniza registros pendentes mesmo
+    sem novas gravações); segmentos são fechados ao atingir TICK_SEGMENT_MAX_BYTES. Ao abrir uma
+    série, registros incompletos ou com CRC inválido no fim do último segmento
+    (gravação interrompida) são descartados. A compactação move segmentos
+    fechados para o armazenamento histórico via append_data, sem regravar o log.
+    """
+
+    def __init__(self, root=None, data_dir=DATA_DIR, backend=STORAGE_BACKEND,
+                 segment_max_bytes=TICK_SEGMENT_MAX_BYTES, fsync_batch=TICK_FSYNC_BATCH,
+                 fsync_interval_seconds=TICK_FSYNC_INTERVAL_SECONDS):
+        self.root = root or os.path.join(data_dir, 'ticks')
+        self.data_dir = data_dir
+        self.backend = backend
+        self.segment_max_bytes = max(RECORD.size, segment_max_bytes - segment_max_bytes % RECORD.size)
+        self.fsync_batch = fsync_batch
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self._writers = {}
+        self._lock = threading.Lock()
+        self._flush_wakeup = threading.Condition(self._lock)
+        self._flush_thread = None
+        self._closing = False
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+        self._stop = threading.Event()
+
+    def _series_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _segments(self, name):
+        """Sequências dos segmentos existentes, em ordem"""
+        try:
+            entries = os.listdir(self._series_dir(name))
+        except OSError:
+            return []
+        return sorted(int(entry[:-len(SEGMENT_SUFFIX)]) for entry in entries
+                      if entry.endswith(SEGMENT_SUFFIX) and entry[:-len(SEGMENT_SUFFIX)].isdigit())
+
+    def _segment_path(self, name, sequence):
+        return os.path.join(self._series_dir(name), f"{sequence:012d}{SEGMENT_SUFFIX}")
+
+    def _recover(self, path):
+        """Trunca o segmento no primeiro registro incompleto ou corrompido"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+
+        valid = len(raw) - len(raw) % RECORD.size
+        view = memoryview(raw)
+        for offset in range(0, valid, RECORD.size):
+            crc = struct.unpack_from('<I', view, offset)[0]
+            if zlib.crc32(view[offset + 4:offset + RECORD.size]) != crc:
+                valid = offset
+                break
+
+        if valid < len(raw):
+            print(f"⚠️ Log {path}: descartando {len(raw) - valid} bytes de gravação interrompida")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _writer(self, name):
+        """Segmento ativo da série (recuperando o último segmento na primeira abertura)"""
+        writer = self._writers.get(name)
+        if writer is not None:
+            return writer
+
+        os.makedirs(self._series_dir(name), exist_ok=True)
+        segments = self._segments(name)
+        sequence = segments[-1] if segments else 0
+        path = self._segment_path(name, sequence)
+        if segments:
+            self._recover(path)
+            if os.path.getsize(path) >= self.segment_max_bytes:
+                sequence += 1
+                path = self._segment_path(name, sequence)
+
+        writer = self._writers[name] = _Writer(path, sequence)
+        return writer
+
+    def _sync(self, writer):
+        writer.file.flush()
+        os.fsync(writer.file.fileno())
+        writer.pending = 0
+        writer.last_sync = time.monotonic()
+        writer.first_pending = None
+
+    def _flush_loop(self):
+        """Faz fsync de cada segmento até fsync_interval_seconds após seu primeiro registro pendente"""
+        with self._lock:
+            while not self._closing:
+                deadlines = [writer.first_pending + self.fsync_interval_seconds
+                             for writer in self._writers.values() if writer.pending]
+                if not deadlines:
+                    self._flush_wakeup.wait()
+                    continue
+                now = time.monotonic()
+                if min(deadlines) > now:
+                    self._flush_wakeup.wait(min(deadlines) - now)
+                    continue
+                for writer in self._writers.values():
+                    if writer.pending and writer.first_pending + self.fsync_interval_seconds <= now:
+                        self._sync(writer)
+
+    def _ensure_flusher(self):
+        """Inicia a thread de fsync periódico (chamado com _lock)"""
+        if self._flush_thread is None or not self._flush_thread.is_alive():
+            self._closing = False
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+
+    def _roll(self, name, writer):
+        """Fecha o segmento ativo; o próximo registro abre um segmento novo"""
+        self._sync(writer)
+        writer.file.close()
+        self._writers[name] = _Writer(self._segment_path(name, writer.sequence + 1), writer.sequence + 1)
+
+    def _write(self, name, buffer):
+        """
+        Grava registros já empacotados no segmento ativo, em uma escrita por
+        segmento (fechando os que atingem o tamanho máximo), e aplica o fsync em lote
+        """
+        with self._lock:
+            self._ensure_flusher()
+            while buffer:
+                writer = self._writer(name)
+                room = max(RECORD.size, self.segment_max_bytes - writer.size)
+                chunk, buffer = buffer[:room], buffer[room:]
+                writer.file.write(chunk)
+                writer.size += len(chunk)
+                if not writer.pending:
+                    writer.first_pending = time.monotonic()
+                    self._flush_wakeup.notify()
+                writer.pending += len(chunk) // RECORD.size
+
+                if writer.size >= self.segment_max_bytes:
+                    self._roll(name, writer)
+                elif (writer.pending >= self.fsync_batch or
+                      time.monotonic() - writer.last_sync >= self.fsync_interval_seconds):
+                    self._sync(writer)
+
+    def append(self, name, timestamp, price, volume=0.0, market_cap=0.0):
+        """Acrescenta um tick/barra ao log da série"""
+        payload = PAYLOAD.pack(_to_nanoseconds(timestamp), price, volume, market_cap)
+        self._write(name, memoryview(struct.pack('<I', zlib.crc32(payload)) + payload))
+
+    def append_frame(self, name, data):
+        """
+        Acrescenta várias barras (DataFrame indexado por data com
+        price/volume/market_cap), empacotadas com NumPy e gravadas de uma vez
+        """
+        if data is None or data.empty:
+            return
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        def column(field):
+            return data[field].to_numpy(dtype='float64') if field in data.columns else 0.0
+
+        records = pack_records(index.as_unit('ns').asi8, column('price'), column('volume'), column('market_cap'))
+        self._write(name, memoryview(records.view(np.uint8)))
+
+    def flush(self):
+        """Força fsync de todos os segmentos ativos"""
+        with self._lock:
+            for writer in self._writers.values():
+                if writer.pending:
+                    self._sync(writer)
+
+    def _read_segments(self, name, sequences):
+        frames = []
+        for sequence in sequences:
+            records = np.fromfile(self._segment_path(name, sequence), dtype=RECORD_DTYPE)
+            if len(records):
+                frames.append(records)
+        if not frames:
+            return None
+
+        records = np.concatenate(frames)
+        data = pd.DataFrame({
+            'price': records['price'],
+            'volume': records['volume'],
+            'market_cap': records['market_cap']
+        }, index=pd.to_datetime(records['timestamp'], unit='ns'))
+        data.index.name = 'date'
+        return data
+
+    def read(self, name):
+        """Registros ainda não compactados da série (último valor por timestamp)"""
+        self.flush()
+        data = self._read_segments(name, self._segments(name))
+        if data is None:
+            return None
+        data = data[~data.index.duplicated(keep='last')]
+        return data.sort_index()
+
+    def compact(self, name=None):
+        """
+        Move os registros do log para o armazenamento histórico
+        (f"{nome}_historical") e remove os segmentos compactados
+
+        Se o processo cair entre a gravação e a remoção, a próxima compactação
+        regrava os mesmos registros, que são deduplicados por append_data.
+        Retorna o número de registros novos no histórico.
+        """
+        names = [name] if name is not None else self.series()
+        added = 0
+
+        with self._compaction_lock:
+            for series_name in names:
+                with self._lock:
+                    writer = self._writers.get(series_name)
+                    if writer is not None and writer.size:
+                        self._roll(series_name, writer)
+                    active = self._writers.get(series_name)
+                    sealed = [sequence for sequence in self._segments(series_name)
+                              if active is None or sequence < active.sequence]
+                    if active is None and sealed:
+                        # Série nunca aberta neste processo: recupera antes de ler
+                        self._recover(self._segment_path(series_name, sealed[-1]))
+
+                data = self._read_segments(series_name, sealed)
+                if data is not None:
+                    data = data[~data.index.duplicated(keep='last')].sort_index()
+                    added += append_data(data, f"{series_name}_historical.csv",
+                                         data_dir=self.data_dir, backend=self.backend)
+
+                for sequence in sealed:
+                    os.remove(self._segment_path(series_name, sequence))
+
+        return added
+
+    def series(self):
+        """Nomes das séries com log"""
+        try:
+            return sorted(entry for entry in os.listdir(self.root)
+                          if os.path.isdir(os.path.join(self.root, entry)))
+        except OSError:
+            return []
+
+    def start_background_compaction(self, interval_seconds=TICK_COMPACTION_INTERVAL_SECONDS):
+        """Compacta todas as séries periodicamente em uma thread daemon"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"⚠️ Falha na compactação do log de ticks: {e}")
+
+        self._compaction_thread = threading.Thread(target=run, daemon=True)
+        self._compaction_thread.start()
+
+    def close(self):
+        """Para as threads em segundo plano e fecha os segmentos (com fsync)"""
+        self._stop.set()
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+        with self._lock:
+            self._closing = True
+            self._flush_wakeup.notify_all()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+
+        with self._lock:
+            for writer in self._writers.values():
+                self._sync(writer)
+                writer.file.close()
+            self._writers.clear()
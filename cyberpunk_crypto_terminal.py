@@ -70,6 +70,7 @@ class CryptoCaptorTerminal:
         # Status do sistema
         print(f"{Fore.GREEN}[SISTEMA ONLINE]{Style.RESET_ALL} {Fore.CYAN}Neural Network Activated{Style.RESET_ALL}")
         print(f"{Fore.GREEN}[CONEXÃO]{Style.RESET_ALL} {Fore.CYAN}Crypto Matrix Interface Ready{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}[CACHE]{Style.RESET_ALL} {Fore.CYAN}{self.collector.cache_summary()}{Style.RESET_ALL}")
         print(f"{Fore.GREEN}[TIMESTAMP]{Style.RESET_ALL} {Fore.YELLOW}{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}")
         print(f"{Fore.GREEN}{'═' * 80}{Style.RESET_ALL}")
 
@@ -29,91 +29,14 @@ try:
     # Se não há dados, cria dados sintéticos históricos desde 2019
     if merged_data.empty:
         print("Criando dados sintéticos históricos desde 2019 para demonstração...")
-        from datetime import datetime
-
-        # Dados desde janeiro de 2019
-        start_date = datetime(2019, 1, 1)
-        end_date = pd.Timestamp.now()
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        total_days = len(dates)
-
-        import numpy as np
-        np.random.seed(42)
-
-        # Simula dados históricos realistas do BTC
-        btc_prices = []
-        btc_price = 3500  # BTC em jan/2019
-
-        # Períodos históricos importantes
-        covid_crash = (datetime(2020, 3, 12), datetime(2020, 3, 20))
-        bull_2020_2021 = (datetime(2020, 10, 1), datetime(2021, 11, 30))
-        bear_2022 = (datetime(2022, 1, 1), datetime(2022, 12, 31))
-        bull_2023_2024 = (datetime(2023, 1, 1), datetime(2024, 3, 31))
-
-        for i, date in enumerate(dates):
-            # Determina o período e ajusta parâmetros
-            if covid_crash[0] <= date <= covid_crash[1]:
-                trend, volatility = -0.05, 0.1  # Crash COVID
-            elif bull_2020_2021[0] <= date <= bull_2020_2021[1]:
-                trend, volatility = 0.003, 0.05  # Bull market
-            elif bear_2022[0] <= date <= bear_2022[1]:
-                trend, volatility = -0.001, 0.04  # Bear market
-            elif bull_2023_2024[0] <= date <= bull_2023_2024[1]:
-                trend, volatility = 0.002, 0.04  # Bull market recente
-            else:
-                trend, volatility = 0.0005, 0.03  # Períodos normais
-
-            change = np.random.normal(trend, volatility)
-            btc_price = max(btc_price * (1 + change), 3000)  # Não deixa ir muito baixo
-            btc_prices.append(btc_price)
-
-        # Simula dados do QANX com correlação variável ao BTC
-        qanx_prices = []
-        qanx_price = 0.001  # QANX inicial
-
-        for i, date in enumerate(dates):
-            btc_change = (btc_prices[i] / btc_prices[i-1] - 1) if i > 0 else 0
-
-            # Correlação varia ao longo do tempo (sua teoria)
-            if date.year <= 2020:
-                correlation = 0.3  # Baixa correlação inicial
-            elif date.year == 2021:
-                correlation = 0.8  # Alta correlação durante bull market
-            elif date.year == 2022:
-                correlation = 0.6  # Correlação média durante bear
-            else:
-                correlation = 0.7  # Correlação alta recente
-
-            # QANX segue BTC com correlação variável + ruído próprio
-            qanx_change = btc_change * correlation + np.random.normal(0, 0.08)
-            qanx_price = max(qanx_price * (1 + qanx_change), 0.0001)
-            qanx_prices.append(qanx_price)
-
-        # Volumes correlacionados com volatilidade
-        btc_volumes = []
-        qanx_volumes = []
-
-        for i in range(total_days):
-            btc_change = abs((btc_prices[i] / btc_prices[i-1] - 1)) if i > 0 else 0.01
-            qanx_change = abs((qanx_prices[i] / qanx_prices[i-1] - 1)) if i > 0 else 0.01
-
-            # Volume aumenta com volatilidade
-            btc_vol = np.random.uniform(1e9, 3e9) * (1 + btc_change * 20)
-            qanx_vol = np.random.uniform(1e6, 5e6) * (1 + qanx_change * 15)
-
-            btc_volumes.append(btc_vol)
-            qanx_volumes.append(qanx_vol)
-
-        merged_data = pd.DataFrame({
-            'price_btc': btc_prices,
-            'price_qanx': qanx_prices,
-            'volume_btc': btc_volumes,
-            'volume_qanx': qanx_volumes,
-            'market_cap_btc': [p * 19e6 for p in btc_prices],
-            'market_cap_qanx': [p * 1e9 for p in qanx_prices]
-        }, index=dates)
-
-        print(f"Dados sintéticos criados: {len(merged_data)} registros de {dates[0].date()} a {dates[-1].date()}")
+        from synthetic_market import generate_synthetic_market, DASHBOARD_PROFILES
+
+        market = generate_synthetic_market(DASHBOARD_PROFILES, start='2019-01-01', seed=42)
+        merged_data = pd.concat(
+            [market['btc'].add_suffix('_btc'), market['qanx'].add_suffix('_qanx')], axis=1
+        )
+
+        print(f"Dados sintéticos criados: {len(merged_data)} registros de {merged_data.index[0].date()} a {merged_data.index[-1].date()}")
 
     # Calcula métricas básicas
     btc_returns = calculate_returns(merged_data['price_btc'])
@@ -6,28 +6,58 @@ import requests
 import pandas as pd
 import time
 from datetime import datetime, timedelta
-import json
 import yfinance as yf
+from urllib.parse import urlparse
 from config import COINGECKO_API_BASE, QANX_ID, BTC_ID
-from utils import save_data, ensure_data_dir
+from crypto_config import OFFLINE_MODE
+from crypto_circuit_breaker import CircuitOpenError, get_breaker
+from crypto_http import get_shared_session
+from synthetic_market import generate_synthetic_market, COLLECTOR_PROFILES
+from utils import save_data, save_json, load_data, ensure_data_dir, get_last_timestamp, append_data, closed_bars
 
 class CryptoDataCollector:
-    def __init__(self):
+    def __init__(self, offline=OFFLINE_MODE):
         self.base_url = COINGECKO_API_BASE
-        self.session = requests.Session()
-        # Headers para evitar rate limiting
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        # Modo offline (--offline ou CRIPTOCAPTOR_OFFLINE): usa apenas os CSVs já salvos em data/
+        self.offline = offline
+        # Sessão compartilhada com o coletor universal (pool, retry e timeouts)
+        self.session = get_shared_session()
+
+    def _get(self, url, params=None):
+        """GET pela sessão compartilhada com circuit breaker por host (erros de rede e 5xx contam como falha)"""
+        breaker = get_breaker(urlparse(url).netloc)
+        breaker.check()
+        try:
+            response = self.session.get(url, params=params)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
 
-    def get_historical_data_yfinance(self, symbol, period='max'):
+    def get_historical_data_yfinance(self, symbol, period='max', start=None):
         """
         Coleta dados usando yfinance como alternativa
+        Com `start`, busca apenas os registros a partir dessa data
         """
         try:
             print(f"Coletando dados históricos para {symbol} via yfinance...")
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period)
+            breaker = get_breaker('yfinance')
+            breaker.check()
+            try:
+                ticker = yf.Ticker(symbol)
+                if start is not None:
+                    data = ticker.history(start=pd.Timestamp(start).strftime('%Y-%m-%d'))
+                else:
+                    data = ticker.history(period=period)
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
 
             if data.empty:
                 print(f"Nenhum dado encontrado para {symbol}")
@@ -62,7 +92,7 @@ class CryptoDataCollector:
 
         try:
             print(f"Tentando API simples para {coin_id}...")
-            response = self.session.get(url, params=params)
+            response = self._get(url, params=params)
 
             if response.status_code == 200:
                 data = response.json()
@@ -75,120 +105,73 @@ class CryptoDataCollector:
 
         return None
 
-    def create_synthetic_data(self, coin_id, current_data):
+    def create_synthetic_data(self, coin_id, current_data, freq='D'):
         """
         Cria dados sintéticos históricos desde 2019 baseado no preço atual
         """
         print(f"Criando dados sintéticos históricos para {coin_id} desde 2019...")
 
         current_price = current_data.get('usd', 1)
+        profile = COLLECTOR_PROFILES['bitcoin' if coin_id == 'bitcoin' else 'qanplatform']
+
+        df = generate_synthetic_market(
+            {coin_id: profile},
+            start=datetime(2019, 1, 1),
+            end=datetime.now(),
+            freq=freq,
+            current_prices={coin_id: current_price},
+            seed=42  # Para resultados reproduzíveis
+        )[coin_id]
+
+        print(f"Dados sintéticos criados: {len(df)} registros de {df.index[0].date()} a {df.index[-1].date()}")
+        return df
 
-        # Gera dados desde janeiro de 2019 até hoje
-        start_date = datetime(2019, 1, 1)
-        end_date = datetime.now()
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        total_days = len(dates)
-
-        print(f"Gerando {total_days} dias de dados históricos...")
-
-        import numpy as np
-        np.random.seed(42)  # Para resultados reproduzíveis
+    def get_historical_data(self, coin_id, days='max', vs_currency='usd', since=None):
+        """
+        Coleta dados históricos de uma criptomoeda com fallbacks
+        Apenas barras diárias já fechadas são retornadas; com `since`, apenas
+        as a partir desse timestamp (inclusive, para corrigir a última salva)
+        """
+        data = None
 
+        # Primeiro tenta yfinance para BTC
         if coin_id == 'bitcoin':
-            # BTC: Simula crescimento histórico real
-            initial_price = 3500  # BTC em jan/2019
-            base_volatility = 0.04
-            # Simula ciclos de bull/bear markets
-            bull_periods = [
-                (datetime(2019, 4, 1), datetime(2019, 6, 30)),   # Bull 2019
-                (datetime(2020, 10, 1), datetime(2021, 11, 30)), # Bull 2020-2021
-                (datetime(2023, 1, 1), datetime(2024, 3, 31)),   # Bull 2023-2024
-            ]
-        else:
-            # QANX: Lançado em 2019, crescimento mais volátil
-            initial_price = 0.001  # QANX inicial
-            base_volatility = 0.06
-            bull_periods = [
-                (datetime(2021, 1, 1), datetime(2021, 5, 31)),   # Bull 2021
-                (datetime(2023, 10, 1), datetime(2024, 3, 31)),  # Bull 2023-2024
-            ]
-
-        prices = []
-        volumes = []
-        price = initial_price
-
-        for i, date in enumerate(dates):
-            # Determina se está em bull market
-            in_bull = any(start <= date <= end for start, end in bull_periods)
-
-            # Ajusta volatilidade e tendência baseado no período
-            if in_bull:
-                trend = 0.002 if coin_id == 'bitcoin' else 0.003
-                volatility = base_volatility * 1.5
-            else:
-                trend = -0.0005 if coin_id == 'bitcoin' else -0.001
-                volatility = base_volatility
+            data = self.get_historical_data_yfinance('BTC-USD', start=since)
 
-            # Adiciona eventos específicos (crashes, pumps)
-            if coin_id == 'bitcoin':
-                # COVID crash março 2020
-                if datetime(2020, 3, 12) <= date <= datetime(2020, 3, 20):
-                    trend = -0.05
-                    volatility = 0.1
-                # ATH novembro 2021
-                elif datetime(2021, 10, 1) <= date <= datetime(2021, 11, 10):
-                    trend = 0.01
-                # FTX crash novembro 2022
-                elif datetime(2022, 11, 6) <= date <= datetime(2022, 11, 15):
-                    trend = -0.03
-                    volatility = 0.08
-
-            # Gera mudança de preço
-            change = np.random.normal(trend, volatility)
-            price = max(price * (1 + change), initial_price * 0.1)  # Não deixa ir muito baixo
-
-            # Volume correlacionado com volatilidade
-            base_volume = 1e9 if coin_id == 'bitcoin' else 1e6
-            volume_multiplier = 1 + abs(change) * 10  # Mais volume em dias voláteis
-            volume = np.random.uniform(base_volume * 0.5, base_volume * 2) * volume_multiplier
-
-            prices.append(price)
-            volumes.append(volume)
+        # Tenta API simples do CoinGecko
+        if data is None:
+            data = self.get_historical_data_coingecko_simple(coin_id)
 
-        # Ajusta para convergir ao preço atual nos últimos dias
-        if len(prices) > 30:
-            adjustment_factor = current_price / prices[-1]
-            for i in range(len(prices) - 30, len(prices)):
-                weight = (i - (len(prices) - 30)) / 30  # 0 a 1
-                prices[i] = prices[i] * (1 + weight * (adjustment_factor - 1))
+        # Se tudo falhar, cria dados sintéticos para demonstração
+        if data is None:
+            print(f"Criando dados de demonstração para {coin_id}...")
+            data = self.create_synthetic_data(coin_id, {'usd': 50000 if coin_id == 'bitcoin' else 0.1})
 
-        df = pd.DataFrame({
-            'price': prices,
-            'volume': volumes,
-            'market_cap': [p * (19e6 if coin_id == 'bitcoin' else 1e9) for p in prices]
-        }, index=dates)
+        data = closed_bars(data, pd.Timedelta(days=1))
+        if since is not None:
+            index = data.index.tz_convert('UTC').tz_localize(None) if data.index.tz is not None else data.index
+            data = data[index >= since]
 
-        print(f"Dados sintéticos criados: {len(df)} registros de {dates[0].date()} a {dates[-1].date()}")
-        return df
+        return data
 
-    def get_historical_data(self, coin_id, days='max', vs_currency='usd'):
+    def update_historical_data(self, coin_id, filename):
         """
-        Coleta dados históricos de uma criptomoeda com fallbacks
+        Coleta incremental: busca a partir da última barra armazenada (inclusive)
+        e grava as novas e as sobrepostas no histórico salvo
         """
-        # Primeiro tenta yfinance para BTC
-        if coin_id == 'bitcoin':
-            data = self.get_historical_data_yfinance('BTC-USD')
+        last_timestamp = get_last_timestamp(filename)
+        if last_timestamp is None:
+            data = self.get_historical_data(coin_id)
             if data is not None:
-                return data
-
-        # Tenta API simples do CoinGecko
-        data = self.get_historical_data_coingecko_simple(coin_id)
-        if data is not None:
+                save_data(data, filename)
             return data
 
-        # Se tudo falhar, cria dados sintéticos para demonstração
-        print(f"Criando dados de demonstração para {coin_id}...")
-        return self.create_synthetic_data(coin_id, {'usd': 50000 if coin_id == 'bitcoin' else 0.1})
+        print(f"Último registro de {coin_id}: {last_timestamp}")
+        new_data = self.get_historical_data(coin_id, since=last_timestamp)
+        added = append_data(new_data, filename)
+        print(f"{added} novos registros para {coin_id}")
+
+        return load_data(filename)
 
     def get_coin_info(self, coin_id):
         """
@@ -209,33 +192,48 @@ class CryptoDataCollector:
         url = f"{self.base_url}/coins/{coin_id}"
         
         try:
-            response = self.session.get(url)
+            response = self._get(url)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Erro ao obter informações de {coin_id}: {e}")
             return None
     
-    def collect_all_data(self):
+    def collect_all_data(self, incremental=False):
         """
         Coleta todos os dados necessários para análise
+        Com `incremental`, apenas registros novos são baixados e anexados
         """
         ensure_data_dir()
+
+        if self.offline:
+            print("=== Modo offline: usando dados locais ===")
+            btc_data = load_data('btc_historical.csv')
+            qanx_data = load_data('qanx_historical.csv')
+            if btc_data is None or qanx_data is None:
+                raise CircuitOpenError("Modo offline sem dados locais (execute a coleta online primeiro)")
+            return btc_data, qanx_data
         
         # Coleta dados do BTC
         print("=== Coletando dados do Bitcoin ===")
-        btc_data = self.get_historical_data(BTC_ID)
-        if btc_data is not None:
-            save_data(btc_data, 'btc_historical.csv')
+        if incremental:
+            btc_data = self.update_historical_data(BTC_ID, 'btc_historical.csv')
+        else:
+            btc_data = self.get_historical_data(BTC_ID)
+            if btc_data is not None:
+                save_data(btc_data, 'btc_historical.csv')
         
         # Pequena pausa para não sobrecarregar a API
         time.sleep(2)
         
         # Coleta dados do QANX
         print("=== Coletando dados do QANX ===")
-        qanx_data = self.get_historical_data(QANX_ID)
-        if qanx_data is not None:
-            save_data(qanx_data, 'qanx_historical.csv')
+        if incremental:
+            qanx_data = self.update_historical_data(QANX_ID, 'qanx_historical.csv')
+        else:
+            qanx_data = self.get_historical_data(QANX_ID)
+            if qanx_data is not None:
+                save_data(qanx_data, 'qanx_historical.csv')
         
         # Coleta informações adicionais
         print("=== Coletando informações adicionais ===")
@@ -243,20 +241,18 @@ class CryptoDataCollector:
         qanx_info = self.get_coin_info(QANX_ID)
         
         if btc_info:
-            with open('data/btc_info.json', 'w') as f:
-                json.dump(btc_info, f, indent=2)
+            save_json(btc_info, 'btc_info.json')
         
         if qanx_info:
-            with open('data/qanx_info.json', 'w') as f:
-                json.dump(qanx_info, f, indent=2)
+            save_json(qanx_info, 'qanx_info.json')
         
         print("=== Coleta de dados concluída! ===")
         return btc_data, qanx_data
 
-def main():
+def main(incremental=False, offline=OFFLINE_MODE):
     """Função principal para executar a coleta"""
-    collector = CryptoDataCollector()
-    btc_data, qanx_data = collector.collect_all_data()
+    collector = CryptoDataCollector(offline=offline)
+    btc_data, qanx_data = collector.collect_all_data(incremental=incremental)
     
     if btc_data is not None and qanx_data is not None:
         print(f"\nResumo dos dados coletados:")
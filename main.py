@@ -6,10 +6,16 @@ import os
 import sys
 from datetime import datetime
 import argparse
+from crypto_config import OFFLINE_MODE
 
 def main():
     parser = argparse.ArgumentParser(description='Análise QANX vs BTC')
     parser.add_argument('--collect', action='store_true', help='Coletar dados históricos')
+    parser.add_argument('--incremental', action='store_true', help='Coletar apenas registros novos')
+    parser.add_argument('--offline', action='store_true', help='Não acessar a rede; usar apenas dados locais')
+    parser.add_argument('--backup', action='store_true', help='Criar um snapshot dos dados agora')
+    parser.add_argument('--restore', nargs='?', const='latest', metavar='SNAPSHOT',
+                        help='Restaurar os dados de um snapshot (padrão: o mais recente)')
     parser.add_argument('--analyze', action='store_true', help='Executar análise')
     parser.add_argument('--dashboard', action='store_true', help='Iniciar dashboard')
     parser.add_argument('--all', action='store_true', help='Executar tudo')
@@ -21,8 +27,18 @@ def main():
         args.analyze = True
         args.dashboard = True
     
+    if args.backup or args.restore:
+        from crypto_backup import BackupManager
+        manager = BackupManager()
+        if args.restore:
+            manager.restore(None if args.restore == 'latest' else args.restore)
+        if args.backup:
+            manager.snapshot()
+        if not any([args.collect, args.analyze, args.dashboard]):
+            return
+    
     if not any([args.collect, args.analyze, args.dashboard]):
-        print("Uso: python main.py [--collect] [--analyze] [--dashboard] [--all]")
+        print("Uso: python main.py [--collect] [--analyze] [--dashboard] [--all] [--backup] [--restore]")
         return
     
     print("=== ANÁLISE QANX vs BTC ===")
@@ -34,8 +50,11 @@ def main():
         print("1. Coletando dados históricos...")
         try:
             from data_collector import main as collect_data
-            collect_data()
+            collect_data(incremental=args.incremental, offline=args.offline or OFFLINE_MODE)
             print("✓ Dados coletados com sucesso!")
+
+            from crypto_backup import maybe_backup
+            maybe_backup()
         except Exception as e:
             print(f"✗ Erro na coleta de dados: {e}")
             return
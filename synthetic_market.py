@@ -0,0 +1,172 @@
+"""
+Gerador vetorizado de mercados sintéticos
+Produz séries de preço, volume e market cap para vários ativos correlacionados,
+em qualquer frequência (diária até 1 minuto), a partir de regimes de mercado
+"""
+
+import numpy as np
+import pandas as pd
+
+# Perfis usados na coleta de demonstração (data_collector.py).
+# Tendência e volatilidade são diárias; regimes posteriores sobrescrevem os anteriores.
+# Cada regime é (início, fim, tendência, volatilidade); volatilidade None mantém a atual.
+COLLECTOR_PROFILES = {
+    'bitcoin': {
+        'initial_price': 3500,          # BTC em jan/2019
+        'trend': -0.0005,
+        'volatility': 0.04,
+        'regimes': [
+            ('2019-04-01', '2019-06-30', 0.002, 0.06),     # Bull 2019
+            ('2020-10-01', '2021-11-30', 0.002, 0.06),     # Bull 2020-2021
+            ('2023-01-01', '2024-03-31', 0.002, 0.06),     # Bull 2023-2024
+            ('2020-03-12', '2020-03-20', -0.05, 0.1),      # COVID crash
+            ('2021-10-01', '2021-11-10', 0.01, None),      # ATH novembro 2021
+            ('2022-11-06', '2022-11-15', -0.03, 0.08),     # FTX crash
+        ],
+        'min_price': 350,               # Não deixa ir muito baixo
+        'volume_range': (0.5e9, 2e9),
+        'volume_sensitivity': 10,       # Mais volume em períodos voláteis
+        'supply': 19e6
+    },
+    'qanplatform': {
+        'initial_price': 0.001,         # QANX inicial
+        'trend': -0.001,
+        'volatility': 0.06,
+        'regimes': [
+            ('2021-01-01', '2021-05-31', 0.003, 0.09),     # Bull 2021
+            ('2023-10-01', '2024-03-31', 0.003, 0.09),     # Bull 2023-2024
+        ],
+        'min_price': 0.0001,
+        'volume_range': (0.5e6, 2e6),
+        'volume_sensitivity': 10,
+        'supply': 1e9
+    }
+}
+
+# Perfis do dashboard: QANX segue o BTC com beta variável ao longo do tempo
+DASHBOARD_PROFILES = {
+    'btc': {
+        'initial_price': 3500,
+        'trend': 0.0005,
+        'volatility': 0.03,
+        'regimes': [
+            ('2020-03-12', '2020-03-20', -0.05, 0.1),      # Crash COVID
+            ('2020-10-01', '2021-11-30', 0.003, 0.05),     # Bull market
+            ('2022-01-01', '2022-12-31', -0.001, 0.04),    # Bear market
+            ('2023-01-01', '2024-03-31', 0.002, 0.04),     # Bull market recente
+        ],
+        'min_price': 3000,
+        'volume_range': (1e9, 3e9),
+        'volume_sensitivity': 20,
+        'supply': 19e6
+    },
+    'qanx': {
+        'initial_price': 0.001,
+        'trend': 0.0,
+        'volatility': 0.08,
+        'follows': 'btc',
+        'beta': 0.7,
+        'beta_regimes': [
+            ('2019-01-01', '2020-12-31', 0.3),             # Baixa correlação inicial
+            ('2021-01-01', '2021-12-31', 0.8),             # Bull market
+            ('2022-01-01', '2022-12-31', 0.6),             # Bear market
+        ],
+        'min_price': 0.0001,
+        'volume_range': (1e6, 5e6),
+        'volume_sensitivity': 15,
+        'supply': 1e9
+    }
+}
+
+
+def _regime_slices(dates, start, end):
+    """Converte um intervalo de datas (fim inclusivo, por dia) em fatia de posições"""
+    first = dates.searchsorted(pd.Timestamp(start), side='left')
+    last = dates.searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side='left')
+    return slice(first, last)
+
+
+def generate_synthetic_market(profiles, start='2019-01-01', end=None, freq='D',
+                              correlation=None, current_prices=None, seed=42,
+                              dtype='float64'):
+    """
+    Gera um mercado sintético para vários ativos de uma vez
+
+    profiles: dict nome -> perfil (ver COLLECTOR_PROFILES); um perfil com
+        'follows' recebe beta * retorno do ativo seguido mais ruído próprio
+        (o ativo seguido deve aparecer antes no dict)
+    correlation: matriz (n_ativos x n_ativos) de correlação dos choques
+    current_prices: dict nome -> preço final; os últimos 30 dias da série
+        convergem suavemente para ele
+    Retorna dict nome -> DataFrame(price, volume, market_cap)
+    """
+    end = pd.Timestamp.now() if end is None else end
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    n_steps, names = len(dates), list(profiles)
+    rng = np.random.default_rng(seed)
+
+    # Parâmetros diários escalados para o passo da série
+    step_days = (dates[1] - dates[0]) / pd.Timedelta(days=1) if n_steps > 1 else 1.0
+
+    shocks = rng.standard_normal((n_steps, len(names)))
+    if correlation is not None:
+        shocks = shocks @ np.linalg.cholesky(np.asarray(correlation, dtype='float64')).T
+
+    returns_by_asset, market = {}, {}
+    for column, name in enumerate(names):
+        profile = profiles[name]
+
+        trend = np.full(n_steps, profile.get('trend', 0.0))
+        volatility = np.full(n_steps, profile.get('volatility', 0.04))
+        for regime_start, regime_end, regime_trend, regime_volatility in profile.get('regimes', []):
+            window = _regime_slices(dates, regime_start, regime_end)
+            trend[window] = regime_trend
+            if regime_volatility is not None:
+                volatility[window] = regime_volatility
+
+        returns = trend * step_days + volatility * np.sqrt(step_days) * shocks[:, column]
+
+        if profile.get('follows'):
+            beta = np.full(n_steps, profile.get('beta', 1.0))
+            for regime_start, regime_end, regime_beta in profile.get('beta_regimes', []):
+                beta[_regime_slices(dates, regime_start, regime_end)] = regime_beta
+            returns = returns + beta * returns_by_asset[profile['follows']]
+
+        # Preço por log-retornos acumulados (retornos abaixo de -99% são truncados).
+        # O piso min_price é refletido passo a passo, como em
+        # price = max(price * (1 + r), min_price), pela recursão de Lindley:
+        # acima do piso, y_t = S_t - min(0, min_{s<=t} S_s).
+        initial_price = profile.get('initial_price', 1.0)
+        min_price = profile.get('min_price', 0.0)
+        log_returns = np.log1p(np.maximum(returns, -0.99))
+        if min_price > 0:
+            above_floor = np.log(initial_price / min_price) + np.cumsum(log_returns)
+            above_floor -= np.minimum(np.minimum.accumulate(above_floor), 0.0)
+            prices = min_price * np.exp(above_floor)
+        else:
+            prices = initial_price * np.exp(np.cumsum(log_returns))
+
+        # Converge para o preço atual nos últimos 30 dias
+        current_price = (current_prices or {}).get(name)
+        converge_steps = min(n_steps, int(round(30 / step_days)))
+        if current_price is not None and converge_steps > 1:
+            weights = np.linspace(0.0, 1.0, converge_steps)
+            prices[-converge_steps:] *= 1 + weights * (current_price / prices[-1] - 1)
+
+        realized = np.empty(n_steps)
+        realized[0] = 0.0
+        realized[1:] = prices[1:] / prices[:-1] - 1
+        returns_by_asset[name] = realized
+
+        # Volume correlacionado com a volatilidade
+        low, high = profile.get('volume_range', (0.5e6, 2e6))
+        volumes = rng.uniform(low, high, n_steps) * step_days
+        volumes *= 1 + np.abs(realized) * profile.get('volume_sensitivity', 10)
+
+        market[name] = pd.DataFrame({
+            'price': prices.astype(dtype, copy=False),
+            'volume': volumes.astype(dtype, copy=False),
+            'market_cap': (prices * profile.get('supply', 1e9)).astype(dtype, copy=False)
+        }, index=dates)
+
+    return market
@@ -6,12 +6,19 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
-from config import DATA_DIR
+import json
+from config import DATA_DIR, STORAGE_BACKEND, MMAP_STORE, COMPACT_DTYPES, COMPACT_COLUMNS
+from crypto_storage import (
+    get_store, normalize_index, compact_frame, encode_frame, expand_frame, merge_frames,
+    storage_metadata
+)
+from crypto_mmap_store import MmapPriceStore
+from crypto_catalog import DataCatalog
 
-def ensure_data_dir():
+def ensure_data_dir(data_dir=DATA_DIR):
     """Garante que o diretório de dados existe"""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
 
 def calculate_returns(prices):
     """Calcula retornos percentuais"""
@@ -79,16 +86,189 @@ def format_currency(value, symbol='$'):
     else:
         return f"{symbol}{value:.2f}"
 
-def save_data(data, filename):
-    """Salva dados em CSV"""
-    ensure_data_dir()
-    filepath = os.path.join(DATA_DIR, filename)
-    data.to_csv(filepath, index=True)
+def save_data(data, filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND, source=None,
+              compact=COMPACT_DTYPES, column_specs=COMPACT_COLUMNS):
+    """
+    Salva dados no backend de armazenamento configurado e atualiza o catálogo
+    Se o conteúdo é idêntico ao já salvo (checksum do catálogo), nada é gravado
+    e o espelho memory-mapped não é invalidado. Com `compact`, as colunas de
+    column_specs são gravadas em float32/inteiros escalados e colunas zeradas
+    ou derivadas do preço não são gravadas (e o espelho memory-mapped, que é
+    float64, não é usado). Retorna True se gravou.
+    """
+    ensure_data_dir(data_dir)
+    store = get_store(backend, data_dir)
+    catalog = DataCatalog(data_dir)
+    compact = compact and isinstance(data.index, pd.DatetimeIndex)
+    stored, encoding = compact_frame(data, column_specs) if compact else (data, None)
+    # O catálogo descreve a série como ela é relida (decodificada, no modo compacto)
+    recorded = expand_frame(stored, encoding, data.columns) if encoding else data
+    if store.exists(filename) and catalog.is_unchanged(filename, recorded):
+        if bool(store.read_metadata(filename)) == bool(encoding):
+            print(f"Dados inalterados, gravação ignorada: {store.path(filename)}")
+            return False
+
+    filepath = store.save(stored, filename, storage_metadata(data.columns, encoding))
+    entry = catalog.record(filename, recorded, source, encoding)
+    if MMAP_STORE and not compact and isinstance(data.index, pd.DatetimeIndex):
+        MmapPriceStore(data_dir).write(data, filename, _mirror_checksum(entry))
     print(f"Dados salvos em: {filepath}")
+    return True
+
+def save_json(obj, filename, data_dir=DATA_DIR):
+    """
+    Grava JSON de forma atômica (temporário + os.replace), pulando a gravação
+    se o arquivo já tem exatamente o mesmo conteúdo. Retorna True se gravou.
+    """
+    ensure_data_dir(data_dir)
+    filepath = os.path.join(data_dir, filename)
+    content = json.dumps(obj, indent=2).encode('utf-8')
+
+    try:
+        with open(filepath, 'rb') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
+    return True
+
+def load_data(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND, start=None, end=None,
+              compact=COMPACT_DTYPES, column_specs=COMPACT_COLUMNS):
+    """
+    Carrega dados salvos (ou None)
+    start/end limitam o período; no Parquet apenas essa fatia é lida.
+    Colunas gravadas de forma compacta são reconstruídas a partir dos
+    metadados gravados com a série; com `compact`, as colunas de
+    column_specs ficam em float32 também na memória.
+    """
+    store = get_store(backend, data_dir)
+    data = store.load(filename, start, end)
+    if data is None:
+        return None
+
+    metadata = store.read_metadata(filename)
+    dtype = 'float32' if compact else 'float64'
+    if metadata:
+        return expand_frame(data, metadata['encoding'], metadata['columns'], dtype)
+    if compact:
+        return data.astype({column: dtype for column in column_specs if column in data.columns})
+    return data
+
+def _mirror_checksum(entry):
+    """Checksum do catálogo guardado no espelho memory-mapped (0 sem entrada)"""
+    return int(entry['checksum'], 16) if entry and entry.get('checksum') else 0
+
+def load_data_mapped(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND, start=None, end=None,
+                     compact=COMPACT_DTYPES):
+    """
+    Como load_data, mas lendo do espelho memory-mapped quando ele está em dia
+    (mesmo número de registros e checksum do catálogo; sem entrada no
+    catálogo, mesmo último timestamp do armazenamento). As colunas do
+    DataFrame são views somente leitura compartilhadas entre processos; sem
+    espelho (ou desatualizado), ou no modo compacto, recai para load_data.
+    """
+    if MMAP_STORE and not compact:
+        series = MmapPriceStore(data_dir).open(filename)
+        if series is not None and get_store(backend, data_dir).exists(filename):
+            entry = DataCatalog(data_dir).get(filename)
+            if entry is not None:
+                fresh = len(series) == entry['rows'] and series.checksum == _mirror_checksum(entry)
+            else:
+                fresh = series.last_timestamp() == get_store(backend, data_dir).last_timestamp(filename)
+            if fresh:
+                return series.to_frame(start, end)
+    return load_data(filename, data_dir, backend, start, end, compact)
+
+def closed_bars(data, bar=None, now=None):
+    """
+    Remove barras que ainda não fecharam antes de persistir: a vela do dia
+    corrente (ccxt/yfinance) ou o ponto "agora" do CoinGecko
+    Uma barra está fechada quando timestamp + `bar` já passou; sem `bar`, usa
+    o espaçamento mediano da série (1 dia se houver menos de dois registros).
+    """
+    if data is None or data.empty:
+        return data
+    index = pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    index = index.as_unit('ns')
+    if bar is None:
+        spacing = np.diff(np.unique(index.asi8))
+        bar = pd.Timedelta(int(np.median(spacing))) if len(spacing) else pd.Timedelta(days=1)
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None) if now is None else pd.Timestamp(now)
+    return data[index + pd.Timedelta(bar) <= now]
+
+def get_last_timestamp(filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND):
+    """
+    Retorna o último timestamp armazenado em um arquivo de dados (ou None)
+    Usa o catálogo; sem entrada nele, lê apenas o final do arquivo
+    """
+    store = get_store(backend, data_dir)
+    if not store.exists(filename):
+        return None
+    entry = DataCatalog(data_dir).get(filename)
+    if entry is not None:
+        return entry['max_ts']
+    return store.last_timestamp(filename)
+
+def append_data(new_data, filename, data_dir=DATA_DIR, backend=STORAGE_BACKEND, source=None,
+                compact=COMPACT_DTYPES):
+    """
+    Anexa novos registros ao histórico salvo, removendo duplicados
+    Registros posteriores ao último armazenado são acrescentados sem regravar
+    o histórico; sobreposições forçam uma regravação deduplicada. Séries
+    compactas recebem os registros na mesma codificação (ou são recodificadas
+    se eles não couberem nela). Retorna o número de registros novos.
+    """
+    if new_data is None or new_data.empty:
+        return 0
+
+    new_data = normalize_index(new_data).sort_index()
+    new_data = new_data[~new_data.index.duplicated(keep='last')]
+
+    store = get_store(backend, data_dir)
+    catalog = DataCatalog(data_dir)
+    if not store.exists(filename):
+        save_data(new_data, filename, data_dir, backend, source, compact)
+        return len(new_data)
+
+    metadata = store.read_metadata(filename)
+    encoding = metadata['encoding'] if metadata else None
+    stored_new = recorded_new = new_data
+    if encoding:
+        columns = metadata['columns']
+        stored_new = encode_frame(new_data[columns], encoding) if set(columns) <= set(new_data.columns) else None
+        if stored_new is None:
+            combined, added = merge_frames(load_data(filename, data_dir, backend, compact=False), new_data)
+            save_data(combined, filename, data_dir, backend, source, compact=True)
+            return added
+        recorded_new = expand_frame(stored_new, encoding, columns)
+
+    # Sobreposições: o catálogo recebe a série combinada em memória, e não a
+    # relida após a gravação; acréscimo puro o atualiza sem ler a série
+    entry = catalog.get(filename)
+    full_data = None
+    if entry is None or recorded_new.index.min() <= entry['max_ts']:
+        full_data, _ = merge_frames(load_data(filename, data_dir, backend, compact=False), recorded_new)
+
+    added = store.append(stored_new, filename)
+
+    if full_data is not None or not catalog.record_append(filename, recorded_new, source):
+        if full_data is None:
+            full_data = load_data(filename, data_dir, backend, compact=False)
+        catalog.record(filename, full_data, source, encoding)
 
-def load_data(filename):
-    """Carrega dados de CSV"""
-    filepath = os.path.join(DATA_DIR, filename)
-    if os.path.exists(filepath):
-        return pd.read_csv(filepath, index_col=0, parse_dates=True)
-    return None
+    if MMAP_STORE and not compact:
+        # O espelho cresce no lugar; só é regravado se o acréscimo não for puro
+        mirror = MmapPriceStore(data_dir)
+        checksum = _mirror_checksum(catalog.get(filename))
+        if full_data is not None or not mirror.append(new_data, filename, checksum):
+            full_data = load_data(filename, data_dir, backend, compact=False) if full_data is None else full_data
+            mirror.write(full_data, filename, checksum)
+    print(f"Anexados {added} registros em: {store.path(filename)}")
+    return added